@@ -1,4 +1,5 @@
-from ._napping_application import NappingApplication
+from typing import TYPE_CHECKING
+
 from ._napping_exception import NappingException
 from ._napping_navigator import NappingNavigator
 
@@ -7,4 +8,16 @@ try:
 except ImportError:
     __version__ = "unknown"
 
+if TYPE_CHECKING:
+    from ._napping_application import NappingApplication
+
 __all__ = ["NappingApplication", "NappingException", "NappingNavigator"]
+
+
+def __getattr__(name: str):
+    # defer importing napari & co. until the application is actually needed
+    if name == "NappingApplication":
+        from ._napping_application import NappingApplication
+
+        return NappingApplication
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
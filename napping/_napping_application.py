@@ -1,10 +1,16 @@
+import csv
+import inspect
+import warnings
 from contextlib import contextmanager
 from os import PathLike
-from typing import Optional, Type, Union
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Pattern, Tuple, Type, Union
 
 import numpy as np
 import pandas as pd
+from qtpy.QtCore import QTimer
 from qtpy.QtWidgets import QApplication
+from skimage.measure import ransac
 from skimage.transform import (
     AffineTransform,
     EuclideanTransform,
@@ -12,25 +18,90 @@ from skimage.transform import (
     SimilarityTransform,
 )
 
+from ._napping_exception import NappingException
 from ._napping_navigator import NappingNavigator
-from .qt import NappingDialog, NappingViewer, NappingWidget
+from .qt import NappingDialog, NappingWidget
+
+if TYPE_CHECKING:
+    from .qt import NappingViewer
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except Exception:
+    pa = None
+    pa_csv = None
+
+# fixed seed, s.t. written transforms are reproducible (scikit-image>=0.23 renamed
+# ransac's random_state argument to rng)
+if "rng" in inspect.signature(ransac).parameters:
+    _RANSAC_SEED_KWARGS = {"rng": 0}
+else:
+    _RANSAC_SEED_KWARGS = {"random_state": 0}
 
 
 class NappingApplication:
     RESTART_RETURN_CODE = 1000
+    CONTROL_POINTS_COLUMNS = ["x_source", "y_source", "x_target", "y_target"]
+    TRANSF_COORDS_CHUNK_SIZE = 100_000
+    RANSAC_MIN_CONTROL_POINTS = 6
+    RANSAC_RESIDUAL_THRESHOLD = 2.0
+    RANSAC_MAX_TRIALS = 100
+    WRITE_DELAY_MSEC = 100
+    TRANSFORM_TYPES: Dict[NappingDialog.TransformType, Type[ProjectiveTransform]] = {
+        NappingDialog.TransformType.EUCLIDEAN: EuclideanTransform,
+        NappingDialog.TransformType.SIMILARITY: SimilarityTransform,
+        NappingDialog.TransformType.AFFINE: AffineTransform,
+    }
+    MATCHING_STRATEGIES: Dict[
+        NappingDialog.MatchingStrategy, NappingNavigator.MatchingStrategy
+    ] = {
+        NappingDialog.MatchingStrategy.ALPHABETICAL: (
+            NappingNavigator.MatchingStrategy.ALPHABETICAL
+        ),
+        NappingDialog.MatchingStrategy.FILENAME: (
+            NappingNavigator.MatchingStrategy.FILENAME
+        ),
+        NappingDialog.MatchingStrategy.REGEX: NappingNavigator.MatchingStrategy.REGEX,
+    }
 
     def __init__(self) -> None:
         self._navigator = NappingNavigator()
         self._current_app: Optional[QApplication] = None
         self._current_widget: Optional[NappingWidget] = None
-        self._current_source_viewer: Optional[NappingViewer] = None
-        self._current_target_viewer: Optional[NappingViewer] = None
+        self._current_source_viewer: Optional["NappingViewer"] = None
+        self._current_target_viewer: Optional["NappingViewer"] = None
         self._transform_type: Optional[Type[ProjectiveTransform]] = None
+        self._transform_estimator: Optional[ProjectiveTransform] = None
+        self._robust_estimation = False
         self._pre_transform: Optional[np.ndarray] = None
         self._post_transform: Optional[np.ndarray] = None
         self._current_transform: Optional[np.ndarray] = None
+        self._current_joint_transform: Optional[np.ndarray] = None
+        self._current_joint_transform_dirty = True
+        self._current_inliers: Optional[np.ndarray] = None
+        self._current_residuals: Optional[np.ndarray] = None
+        self._current_residuals_mean: Optional[float] = None
+        self._current_residuals_dirty = True
+        self._current_transform_key: Optional[
+            Tuple[Optional[Type[ProjectiveTransform]], bytes, bytes]
+        ] = None
+        self._current_control_points: Optional[pd.DataFrame] = None
+        self._current_control_points_dirty = True
+        self._current_source_control_point_coords: Optional[np.ndarray] = None
+        self._current_target_control_point_coords: Optional[np.ndarray] = None
         self._current_source_coords: Optional[pd.DataFrame] = None
+        self._current_source_coords_xy: Optional[np.ndarray] = None
         self._current_transf_coords: Optional[pd.DataFrame] = None
+        self._current_transf_coords_xy: Optional[np.ndarray] = None
+        self._current_transf_coords_buffer: Optional[np.ndarray] = None
+        self._written_control_points_key: Optional[Tuple[Path, bytes, bytes]] = None
+        self._written_joint_transform_key: Optional[Tuple[Path, bytes]] = None
+        self._written_transf_coords_key: Optional[Tuple[Path, bytes]] = None
+        self._write_timer: Optional[QTimer] = None
+        self._pending_write_files: Optional[
+            Tuple[Optional[Path], Optional[Path], Optional[Path]]
+        ] = None
         self._write_blocked = False
 
     def exec(self, app: Optional[QApplication] = None) -> None:
@@ -46,23 +117,29 @@ class NappingApplication:
                 self._navigator.current_target_img_file
             )
             self._current_widget = self._create_widget()
+            self._current_control_points_dirty = True
             assert self._navigator.current_control_points_file is not None
             if self._navigator.current_control_points_file.is_file():
-                current_control_points = pd.read_csv(
-                    self._navigator.current_control_points_file,
-                    index_col=0,
+                current_control_points = self._read_control_points(
+                    self._navigator.current_control_points_file
                 )
                 if len(current_control_points.index) > 0:
                     self.set_current_control_points(current_control_points)
+            self._current_source_coords = None
+            self._current_source_coords_xy = None
+            self._current_transf_coords_buffer = None
             if (
                 self._navigator.current_source_coords_file is not None
                 and self._navigator.current_source_coords_file.is_file()
             ):
-                current_source_coords = pd.read_csv(
+                current_source_coords = self._read_coords(
                     self._navigator.current_source_coords_file
                 )
                 if len(current_source_coords.index) > 0:
                     self._current_source_coords = current_source_coords
+                    self._current_source_coords_xy = current_source_coords.loc[
+                        :, ["X", "Y"]
+                    ].to_numpy()
             self._update_current_transform()
             self._update_current_transf_coords()
             self._current_source_viewer.control_points_changed_handlers.append(
@@ -76,6 +153,7 @@ class NappingApplication:
             self._current_widget.show()
             self._current_widget.refresh()
             return_code = self._current_app.exec()
+            self._flush_write()
 
     def exec_dialog(self, app: Optional[QApplication] = None) -> None:
         if app is None:
@@ -83,11 +161,9 @@ class NappingApplication:
         dialog = self._create_dialog()
         if dialog.exec() == NappingDialog.DialogCode.Accepted:
             assert dialog.transform_type is not None
-            self._transform_type = {
-                NappingDialog.TransformType.EUCLIDEAN: EuclideanTransform,
-                NappingDialog.TransformType.SIMILARITY: SimilarityTransform,
-                NappingDialog.TransformType.AFFINE: AffineTransform,
-            }[dialog.transform_type]
+            self._transform_type = NappingApplication.TRANSFORM_TYPES[
+                dialog.transform_type
+            ]
             if dialog.pre_transform_path is not None:
                 self._pre_transform = np.load(dialog.pre_transform_path)
             else:
@@ -96,6 +172,7 @@ class NappingApplication:
                 self._post_transform = np.load(dialog.post_transform_path)
             else:
                 self._post_transform = None
+            self._current_joint_transform_dirty = True
             if dialog.selection_mode == NappingDialog.SelectionMode.FILE:
                 assert dialog.source_img_path is not None
                 assert dialog.target_img_path is not None
@@ -119,25 +196,24 @@ class NappingApplication:
                 dialog.joint_transform_path.mkdir(exist_ok=True)
                 if dialog.transf_coords_path is not None:
                     dialog.transf_coords_path.mkdir(exist_ok=True)
+                # regexes are only validated (and compiled) if they are used
+                source_regex: Optional[Pattern] = None
+                target_regex: Optional[Pattern] = None
+                source_coords_regex: Optional[Pattern] = None
+                if dialog.matching_strategy == NappingDialog.MatchingStrategy.REGEX:
+                    source_regex = dialog.source_regex_compiled
+                    target_regex = dialog.target_regex_compiled
+                    if dialog.source_coords_path is not None:
+                        source_coords_regex = dialog.source_coords_regex_compiled
                 self._navigator.load_dir(
                     dialog.source_img_path,
                     dialog.target_img_path,
                     dialog.control_points_path,
                     dialog.joint_transform_path,
-                    {
-                        NappingDialog.MatchingStrategy.ALPHABETICAL: (
-                            NappingNavigator.MatchingStrategy.ALPHABETICAL
-                        ),
-                        NappingDialog.MatchingStrategy.FILENAME: (
-                            NappingNavigator.MatchingStrategy.FILENAME
-                        ),
-                        NappingDialog.MatchingStrategy.REGEX: (
-                            NappingNavigator.MatchingStrategy.REGEX
-                        ),
-                    }[dialog.matching_strategy],
-                    source_regex=dialog.source_regex,
-                    target_regex=dialog.target_regex,
-                    source_coords_regex=dialog.source_coords_regex,
+                    NappingApplication.MATCHING_STRATEGIES[dialog.matching_strategy],
+                    source_regex=source_regex,
+                    target_regex=target_regex,
+                    source_coords_regex=source_coords_regex,
                     source_coords_dir=dialog.source_coords_path,
                     transf_coords_dir=dialog.transf_coords_path,
                 )
@@ -150,6 +226,7 @@ class NappingApplication:
         assert self._current_widget is not None
         assert self._current_source_viewer is not None
         assert self._current_target_viewer is not None
+        self._flush_write()
         self._current_source_viewer.close()
         self._current_target_viewer.close()
         self._current_widget.close()
@@ -158,40 +235,37 @@ class NappingApplication:
         self._current_widget = None
         self._current_source_viewer = None
         self._current_target_viewer = None
+        self._current_control_points = None
+        self._current_control_points_dirty = True
+        self._current_source_control_point_coords = None
+        self._current_target_control_point_coords = None
+        self._current_residuals = None
+        self._current_residuals_mean = None
+        self._current_residuals_dirty = True
+        self._written_control_points_key = None
+        self._written_joint_transform_key = None
+        self._written_transf_coords_key = None
 
     def get_current_joint_transform(self) -> Optional[np.ndarray]:
-        if self._current_transform is not None:
+        if self._current_joint_transform_dirty:
             current_joint_transform = self._current_transform
-            if self._pre_transform is not None:
-                current_joint_transform = current_joint_transform @ self._pre_transform
-            if self._post_transform is not None:
-                current_joint_transform = self._post_transform @ current_joint_transform
-            return current_joint_transform
-        return None
+            if current_joint_transform is not None:
+                if self._pre_transform is not None:
+                    current_joint_transform = (
+                        current_joint_transform @ self._pre_transform
+                    )
+                if self._post_transform is not None:
+                    current_joint_transform = (
+                        self._post_transform @ current_joint_transform
+                    )
+            self._current_joint_transform = current_joint_transform
+            self._current_joint_transform_dirty = False
+        return self._current_joint_transform
 
     def get_current_control_points(self) -> Optional[pd.DataFrame]:
-        if (
-            self._current_source_viewer is not None
-            and self._current_target_viewer is not None
-        ):
-            current_source_control_points = (
-                self._current_source_viewer.get_control_points()
-            )
-            current_target_control_points = (
-                self._current_target_viewer.get_control_points()
-            )
-            if (
-                current_source_control_points is not None
-                and current_target_control_points is not None
-            ):
-                return pd.merge(
-                    current_source_control_points,
-                    current_target_control_points,
-                    left_index=True,
-                    right_index=True,
-                    suffixes=("_source", "_target"),
-                )
-        return None
+        if self._current_control_points_dirty:
+            self._update_current_control_points()
+        return self._current_control_points
 
     def set_current_control_points(
         self, current_control_points: Optional[pd.DataFrame]
@@ -200,14 +274,21 @@ class NappingApplication:
         assert self._current_target_viewer is not None
         with self._block_write():
             if current_control_points is not None:
-                current_source_control_points = current_control_points.loc[
-                    :, ["x_source", "y_source"]
-                ].copy()
-                current_target_control_points = current_control_points.loc[
-                    :, ["x_target", "y_target"]
-                ].copy()
-                current_source_control_points.columns = ["x", "y"]
-                current_target_control_points.columns = ["x", "y"]
+                coords = current_control_points.loc[
+                    :, NappingApplication.CONTROL_POINTS_COLUMNS
+                ].to_numpy()
+                current_source_control_points = pd.DataFrame(
+                    data=coords[:, :2],
+                    index=current_control_points.index,
+                    columns=["x", "y"],
+                    copy=False,
+                )
+                current_target_control_points = pd.DataFrame(
+                    data=coords[:, 2:],
+                    index=current_control_points.index,
+                    columns=["x", "y"],
+                    copy=False,
+                )
                 self._current_source_viewer.set_control_points(
                     current_source_control_points
                 )
@@ -217,86 +298,374 @@ class NappingApplication:
             else:
                 self._current_source_viewer.set_control_points(None)
                 self._current_target_viewer.set_control_points(None)
+        self._current_control_points_dirty = True
 
     def get_current_control_point_residuals(
         self,
     ) -> Optional[np.ndarray]:
-        if self._current_transform is not None:
-            current_control_points = self.get_current_control_points()
-            if current_control_points is not None and not current_control_points.empty:
-                assert self._transform_type is not None
-                tf = self._transform_type(self._current_transform)
-                return tf.residuals(
-                    current_control_points.loc[:, ["x_source", "y_source"]].to_numpy(),
-                    current_control_points.loc[:, ["x_target", "y_target"]].to_numpy(),
-                )
-        return None
+        if self._current_control_points_dirty:
+            self._update_current_control_points()
+        if self._current_residuals_dirty:
+            self._current_residuals = None
+            src = self._current_source_control_point_coords
+            dst = self._current_target_control_point_coords
+            if (
+                self._current_transform is not None
+                and src is not None
+                and dst is not None
+                and len(src) > 0
+            ):
+                a, t = self._affine2x3(self._current_transform)
+                d = src @ a.T + t - dst
+                self._current_residuals = np.sqrt(np.einsum("ij,ij->i", d, d))
+            self._current_residuals_mean = None
+            if self._current_residuals is not None:
+                # same result as np.mean, without its dispatch overhead for the
+                # typically few control points (residuals are never empty here)
+                self._current_residuals_mean = float(
+                    np.add.reduce(self._current_residuals)
+                ) / len(self._current_residuals)
+            self._current_residuals_dirty = False
+        return self._current_residuals
+
+    def get_current_control_point_residuals_mean(self) -> Optional[float]:
+        self.get_current_control_point_residuals()
+        return self._current_residuals_mean
 
     def _create_dialog(self) -> NappingDialog:
         return NappingDialog()
 
-    def _create_source_viewer(self, img_file: Union[str, PathLike]) -> NappingViewer:
+    def _create_source_viewer(self, img_file: Union[str, PathLike]) -> "NappingViewer":
+        from .qt import NappingViewer
+
         return NappingViewer(img_file)
 
-    def _create_target_viewer(self, img_file: Union[str, PathLike]) -> NappingViewer:
+    def _create_target_viewer(self, img_file: Union[str, PathLike]) -> "NappingViewer":
+        from .qt import NappingViewer
+
         return NappingViewer(img_file)
 
     def _create_widget(self) -> NappingWidget:
         return NappingWidget(self)
 
+    def _update_current_control_points(self) -> None:
+        self._current_residuals_dirty = True
+        self._current_control_points = self._match_current_control_points()
+        if self._current_control_points is not None:
+            # contiguous copies, s.t. estimation, residuals and change detection
+            # (tobytes) do not operate on strided column views
+            coords = self._current_control_points.to_numpy(dtype=np.float64)
+            self._current_source_control_point_coords = np.ascontiguousarray(
+                coords[:, :2]
+            )
+            self._current_target_control_point_coords = np.ascontiguousarray(
+                coords[:, 2:]
+            )
+        else:
+            self._current_source_control_point_coords = None
+            self._current_target_control_point_coords = None
+        self._current_control_points_dirty = False
+
+    def _match_current_control_points(self) -> Optional[pd.DataFrame]:
+        if (
+            self._current_source_viewer is not None
+            and self._current_target_viewer is not None
+        ):
+            current_source_control_point_arrays = (
+                self._current_source_viewer.get_control_point_arrays()
+            )
+            current_target_control_point_arrays = (
+                self._current_target_viewer.get_control_point_arrays()
+            )
+            if (
+                current_source_control_point_arrays is not None
+                and current_target_control_point_arrays is not None
+            ):
+                # both viewers identify control points by id, so an index
+                # intersection is sufficient (no need for a full pd.merge)
+                source_xy, source_ids = current_source_control_point_arrays
+                target_xy, target_ids = current_target_control_point_arrays
+                source_index = pd.Index(source_ids)
+                target_index = pd.Index(target_ids)
+                if not source_index.is_unique or not target_index.is_unique:
+                    # transiently, e.g. while napari pads features for new data
+                    return pd.merge(
+                        pd.DataFrame(source_xy, index=source_index),
+                        pd.DataFrame(target_xy, index=target_index),
+                        left_index=True,
+                        right_index=True,
+                    ).set_axis(NappingApplication.CONTROL_POINTS_COLUMNS, axis=1)
+                index = source_index.intersection(target_index)
+                return pd.DataFrame(
+                    data=np.hstack(
+                        (
+                            source_xy[source_index.get_indexer(index)],
+                            target_xy[target_index.get_indexer(index)],
+                        )
+                    ),
+                    index=index,
+                    columns=NappingApplication.CONTROL_POINTS_COLUMNS,
+                )
+        return None
+
     def _handle_control_points_changed(
-        self, viewer: NappingViewer, control_points: Optional[pd.DataFrame]
+        self, viewer: "NappingViewer", control_points: Optional[pd.DataFrame]
     ) -> None:
-        current_control_points = self.get_current_control_points()
-        if not self._write_blocked and current_control_points is not None:
-            assert self._navigator.current_control_points_file is not None
-            with self._navigator.current_control_points_file.open(
-                mode="wb", buffering=0
-            ) as f:
-                current_control_points.to_csv(f, mode="wb")
+        self._current_control_points_dirty = True
         self._update_current_transform()
-        current_joint_transform = self.get_current_joint_transform()
-        if not self._write_blocked and current_joint_transform is not None:
-            np.save(
-                self._navigator.current_joint_transform_file,
-                current_joint_transform,
-            )
         self._update_current_transf_coords()
-        if not self._write_blocked and self._current_transf_coords is not None:
-            assert self._navigator.current_transf_coords_file is not None
-            with self._navigator.current_transf_coords_file.open(
-                mode="wb", buffering=0
-            ) as f:
-                self._current_transf_coords.to_csv(f, mode="wb", index=False)
+        if not self._write_blocked:
+            self._schedule_write()
         assert self._current_widget is not None
-        self._current_widget.refresh()
+        self._current_widget.schedule_refresh()
+
+    def _schedule_write(self) -> None:
+        # debounce writing, e.g. while control points are being dragged; the
+        # files are recorded now, since navigating changes the current files
+        self._pending_write_files = (
+            self._navigator.current_control_points_file,
+            self._navigator.current_joint_transform_file,
+            self._navigator.current_transf_coords_file,
+        )
+        if self._write_timer is None:
+            self._write_timer = QTimer()
+            self._write_timer.setSingleShot(True)
+            self._write_timer.setInterval(NappingApplication.WRITE_DELAY_MSEC)
+            self._write_timer.timeout.connect(self._flush_write)
+        self._write_timer.start()
+
+    def _flush_write(self) -> None:
+        if self._write_timer is not None:
+            self._write_timer.stop()
+        if self._pending_write_files is None:
+            return
+        (
+            control_points_file,
+            joint_transform_file,
+            transf_coords_file,
+        ) = self._pending_write_files
+        self._pending_write_files = None
+        # files are only rewritten if their contents changed (e.g. not when a
+        # control point was selected but not moved)
+        current_control_points = self.get_current_control_points()
+        if current_control_points is not None:
+            assert control_points_file is not None
+            control_points_key = (
+                control_points_file,
+                current_control_points.index.to_numpy().tobytes(),
+                current_control_points.to_numpy().tobytes(),
+            )
+            if control_points_key != self._written_control_points_key:
+                self._write_control_points(control_points_file, current_control_points)
+                self._written_control_points_key = control_points_key
+        current_joint_transform = self.get_current_joint_transform()
+        if current_joint_transform is not None:
+            assert joint_transform_file is not None
+            joint_transform_key = (
+                joint_transform_file,
+                current_joint_transform.tobytes(),
+            )
+            if joint_transform_key != self._written_joint_transform_key:
+                np.save(joint_transform_file, current_joint_transform)
+                self._written_joint_transform_key = joint_transform_key
+        if self._current_transf_coords_xy is not None:
+            assert transf_coords_file is not None
+            assert self._current_source_coords is not None
+            assert current_joint_transform is not None
+            transf_coords_key = (transf_coords_file, current_joint_transform.tobytes())
+            if transf_coords_key != self._written_transf_coords_key:
+                self._write_transf_coords(
+                    transf_coords_file,
+                    self._current_source_coords,
+                    self._current_transf_coords_xy,
+                )
+                self._written_transf_coords_key = transf_coords_key
 
     def _update_current_transform(self) -> None:
+        if self._current_control_points_dirty:
+            self._update_current_control_points()
+        src = self._current_source_control_point_coords
+        dst = self._current_target_control_point_coords
+        assert src is not None and dst is not None
+        # skip re-estimation if neither the control points nor the transform type
+        # changed (e.g. when a control point was selected but not moved)
+        current_transform_key = (self._transform_type, src.tobytes(), dst.tobytes())
+        if current_transform_key == self._current_transform_key:
+            return
+        self._current_transform_key = current_transform_key
+        self._current_residuals_dirty = True
+        self._current_joint_transform_dirty = True
         self._current_transform = None
-        current_control_points = self.get_current_control_points()
-        assert current_control_points is not None
-        if current_control_points.shape[0] >= 3:
+        self._current_inliers = None
+        num_control_points = len(src)
+        if num_control_points >= 3:
             assert self._transform_type is not None
-            tf = self._transform_type()
-            if tf.estimate(
-                current_control_points.loc[:, ["x_source", "y_source"]].to_numpy(),
-                current_control_points.loc[:, ["x_target", "y_target"]].to_numpy(),
+            if (
+                self._robust_estimation
+                and num_control_points >= NappingApplication.RANSAC_MIN_CONTROL_POINTS
             ):
+                # opt-in robust estimation, s.t. single misplaced control points do
+                # not distort the transform; by default, all control points are
+                # used, since RANSAC also discards correctly placed (noisy) ones
+                model, inliers = ransac(
+                    (src, dst),
+                    self._transform_type,
+                    min_samples=3,
+                    residual_threshold=NappingApplication.RANSAC_RESIDUAL_THRESHOLD,
+                    max_trials=NappingApplication.RANSAC_MAX_TRIALS,
+                    **_RANSAC_SEED_KWARGS,
+                )
+                if model is not None:
+                    self._current_transform = model.params
+                    self._current_inliers = inliers
+                    return
+            if self._transform_type in (EuclideanTransform, SimilarityTransform):
+                current_transform = self._estimate_rigid_transform(
+                    src, dst, estimate_scale=self._transform_type is SimilarityTransform
+                )
+                if current_transform is not None:
+                    self._current_transform = current_transform
+                    self._current_inliers = np.ones(num_control_points, dtype=bool)
+                return
+            # estimate() replaces params, so the estimator can be reused across edits
+            tf = self._transform_estimator
+            if tf is None or type(tf) is not self._transform_type:
+                tf = self._transform_type()
+                self._transform_estimator = tf
+            if tf.estimate(src, dst):
                 self._current_transform = tf.params
+                self._current_inliers = np.ones(num_control_points, dtype=bool)
+
+    @staticmethod
+    def _estimate_rigid_transform(
+        src: np.ndarray, dst: np.ndarray, estimate_scale: bool = False
+    ) -> Optional[np.ndarray]:
+        # closed-form 2D least-squares solution (Umeyama), equivalent to the
+        # SVD-based estimation of skimage's Euclidean/SimilarityTransform
+        src_mean = src.mean(axis=0)
+        dst_mean = dst.mean(axis=0)
+        src_demean = src - src_mean
+        a = (dst - dst_mean).T @ src_demean
+        c = a[0, 0] + a[1, 1]
+        s = a[1, 0] - a[0, 1]
+        norm = np.hypot(c, s)
+        if norm == 0.0:
+            return None
+        r = np.array([[c, -s], [s, c]]) / norm
+        if estimate_scale:
+            r *= norm / np.einsum("ij,ij->", src_demean, src_demean)
+        transform = np.eye(3)
+        transform[:2, :2] = r
+        transform[:2, 2] = dst_mean - r @ src_mean
+        return transform
 
     def _update_current_transf_coords(self) -> None:
+        # the transformed coordinates frame is only materialized on access
         self._current_transf_coords = None
+        self._current_transf_coords_xy = None
         current_joint_transform = self.get_current_joint_transform()
         if (
-            self._current_source_coords is not None
+            self._current_source_coords_xy is not None
             and current_joint_transform is not None
         ):
-            x = np.ones((self._current_source_coords.shape[0], 3))
-            x[:, :2] = self._current_source_coords.loc[:, ["X", "Y"]].to_numpy()
-            self._current_transf_coords = self._current_source_coords.copy()
-            self._current_transf_coords.loc[:, ["X", "Y"]] = (
-                current_joint_transform @ x.T
-            ).T[:, :2]
+            xy = self._current_source_coords_xy
+            a, t = self._affine2x3(current_joint_transform, dtype=xy.dtype)
+            # reuse the output buffer across edits of the same image
+            transf_xy = self._current_transf_coords_buffer
+            if transf_xy is None or transf_xy.shape != xy.shape:
+                transf_xy = np.empty_like(xy)
+                self._current_transf_coords_buffer = transf_xy
+            np.matmul(xy, a.T, out=transf_xy)
+            transf_xy += t
+            self._current_transf_coords_xy = transf_xy
+
+    @staticmethod
+    def _affine2x3(
+        transform: np.ndarray, dtype: Optional[np.dtype] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        # the first two rows of the homogeneous product do not depend on the
+        # bottom row, i.e. no ones-padded (N, 3) coordinates are needed
+        # (supported transforms are affine, i.e. there is no perspective division)
+        return (
+            np.asarray(transform[:2, :2], dtype=dtype),
+            np.asarray(transform[:2, 2], dtype=dtype),
+        )
+
+    @staticmethod
+    def _read_control_points(path: Union[str, PathLike]) -> pd.DataFrame:
+        # np.loadtxt avoids pandas' CSV parsing overhead for this small table;
+        # columns are located by name (the first column holds the index)
+        with open(path, newline="") as f:
+            header = next(csv.reader(f), [])
+        usecols = [0]
+        for column in NappingApplication.CONTROL_POINTS_COLUMNS:
+            if column not in header[1:]:
+                raise NappingException(
+                    f"Column {column} missing in control points file {path}"
+                )
+            usecols.append(header.index(column, 1))
+        with warnings.catch_warnings():
+            warnings.filterwarnings(
+                "ignore", message="loadtxt: input contained no data"
+            )
+            data = np.loadtxt(
+                path, delimiter=",", skiprows=1, usecols=usecols, ndmin=2
+            ).reshape(-1, 5)
+        return pd.DataFrame(
+            data=data[:, 1:],
+            index=data[:, 0].astype(np.int64),
+            columns=NappingApplication.CONTROL_POINTS_COLUMNS,
+        )
+
+    @staticmethod
+    def _write_control_points(
+        path: Union[str, PathLike], control_points: pd.DataFrame
+    ) -> None:
+        np.savetxt(
+            path,
+            np.column_stack(
+                (
+                    control_points.index.to_numpy(dtype=np.int64),
+                    control_points.loc[
+                        :, NappingApplication.CONTROL_POINTS_COLUMNS
+                    ].to_numpy(),
+                )
+            ),
+            fmt=["%d"] + ["%.6f"] * len(NappingApplication.CONTROL_POINTS_COLUMNS),
+            delimiter=",",
+            header=",".join([""] + NappingApplication.CONTROL_POINTS_COLUMNS),
+            comments="",
+        )
+
+    @staticmethod
+    def _read_coords(path: Union[str, PathLike]) -> pd.DataFrame:
+        # single precision is sufficient for sub-pixel accuracy
+        if pa_csv is not None:
+            convert_options = pa_csv.ConvertOptions(
+                column_types={"X": pa.float32(), "Y": pa.float32()}
+            )
+            # the table is not used afterwards, so it can be released while
+            # converting (avoids holding two full copies of the coordinates)
+            return pa_csv.read_csv(
+                str(path), convert_options=convert_options
+            ).to_pandas(split_blocks=True, self_destruct=True)
+        return pd.read_csv(path, dtype={"X": np.float32, "Y": np.float32})
+
+    @staticmethod
+    def _write_transf_coords(
+        path: Union[str, PathLike],
+        source_coords: pd.DataFrame,
+        transf_coords_xy: np.ndarray,
+    ) -> None:
+        # write in chunks to avoid holding a full copy of the coordinates; the
+        # header is written separately, s.t. empty tables yield a header-only file
+        chunk_size = NappingApplication.TRANSF_COORDS_CHUNK_SIZE
+        with open(path, mode="w", newline="") as f:
+            source_coords.iloc[:0].to_csv(f, index=False)
+            for start in range(0, len(source_coords.index), chunk_size):
+                chunk = source_coords.iloc[start : start + chunk_size].copy()
+                chunk[["X", "Y"]] = transf_coords_xy[start : start + chunk_size]
+                chunk.to_csv(f, header=False, index=False)
 
     @contextmanager
     def _block_write(self):
@@ -317,11 +686,11 @@ class NappingApplication:
         return self._current_widget
 
     @property
-    def current_source_viewer(self) -> Optional[NappingViewer]:
+    def current_source_viewer(self) -> Optional["NappingViewer"]:
         return self._current_source_viewer
 
     @property
-    def current_target_viewer(self) -> Optional[NappingViewer]:
+    def current_target_viewer(self) -> Optional["NappingViewer"]:
         return self._current_target_viewer
 
     @property
@@ -334,6 +703,15 @@ class NappingApplication:
     ) -> None:
         self._transform_type = transform_type
 
+    @property
+    def robust_estimation(self) -> bool:
+        return self._robust_estimation
+
+    @robust_estimation.setter
+    def robust_estimation(self, robust_estimation: bool) -> None:
+        self._robust_estimation = robust_estimation
+        self._current_transform_key = None
+
     @property
     def pre_transform(self) -> Optional[np.ndarray]:
         return self._pre_transform
@@ -341,6 +719,7 @@ class NappingApplication:
     @pre_transform.setter
     def pre_transform(self, pre_transform: Optional[np.ndarray]) -> None:
         self._pre_transform = pre_transform
+        self._current_joint_transform_dirty = True
 
     @property
     def post_transform(self) -> Optional[np.ndarray]:
@@ -349,15 +728,27 @@ class NappingApplication:
     @post_transform.setter
     def post_transform(self, post_transform: Optional[np.ndarray]) -> None:
         self._post_transform = post_transform
+        self._current_joint_transform_dirty = True
 
     @property
     def current_transform(self) -> Optional[np.ndarray]:
         return self._current_transform
 
+    @property
+    def current_inliers(self) -> Optional[np.ndarray]:
+        return self._current_inliers
+
     @property
     def current_source_coords(self) -> Optional[pd.DataFrame]:
         return self._current_source_coords
 
     @property
     def current_transf_coords(self) -> Optional[pd.DataFrame]:
+        if (
+            self._current_transf_coords is None
+            and self._current_transf_coords_xy is not None
+        ):
+            assert self._current_source_coords is not None
+            self._current_transf_coords = self._current_source_coords.copy()
+            self._current_transf_coords[["X", "Y"]] = self._current_transf_coords_xy
         return self._current_transf_coords
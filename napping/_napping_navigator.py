@@ -1,8 +1,21 @@
+import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 from enum import IntEnum
+from operator import attrgetter
 from os import PathLike
 from pathlib import Path
-from typing import Callable, List, Optional, Sequence, Tuple, Union
+from typing import (
+    Callable,
+    Dict,
+    Hashable,
+    List,
+    Optional,
+    Pattern,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from ._napping_exception import NappingException
 
@@ -53,9 +66,9 @@ class NappingNavigator:
         control_points_dir: Union[str, PathLike],
         joint_transform_dir: Union[str, PathLike],
         matching_strategy: "NappingNavigator.MatchingStrategy",
-        source_regex: Optional[str] = None,
-        target_regex: Optional[str] = None,
-        source_coords_regex: Optional[str] = None,
+        source_regex: Union[str, Pattern, None] = None,
+        target_regex: Union[str, Pattern, None] = None,
+        source_coords_regex: Union[str, Pattern, None] = None,
         source_coords_dir: Optional[Union[str, PathLike]] = None,
         transf_coords_dir: Optional[Union[str, PathLike]] = None,
     ) -> None:
@@ -63,22 +76,47 @@ class NappingNavigator:
         target_img_dir = Path(target_img_dir)
         control_points_dir = Path(control_points_dir)
         joint_transform_dir = Path(joint_transform_dir)
-        if source_coords_dir is not None:
-            source_coords_dir = Path(source_coords_dir)
+        if matching_strategy not in (
+            NappingNavigator.MatchingStrategy.ALPHABETICAL,
+            NappingNavigator.MatchingStrategy.FILENAME,
+            NappingNavigator.MatchingStrategy.REGEX,
+        ):
+            raise ValueError(f"Unsupported file matching strategy: {matching_strategy}")
+        # directory scans are I/O-bound and independent (e.g. on network shares),
+        # so list all directories concurrently before matching
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            source_img_files_future = executor.submit(self._list_files, source_img_dir)
+            target_img_files_future = executor.submit(self._list_files, target_img_dir)
+            if source_coords_dir is not None:
+                source_coords_files_future = executor.submit(
+                    self._list_files, Path(source_coords_dir)
+                )
+            else:
+                source_coords_files_future = None
+            source_img_files = source_img_files_future.result()
+            target_img_files = target_img_files_future.result()
+            if source_coords_files_future is not None:
+                source_coords_files: Optional[List[Path]] = (
+                    source_coords_files_future.result()
+                )
+            else:
+                source_coords_files = None
         if matching_strategy == NappingNavigator.MatchingStrategy.ALPHABETICAL:
             (
                 self._source_img_files,
                 self._target_img_files,
                 self._source_coords_files,
             ) = self._match_alphabetical(
-                source_img_dir, target_img_dir, source_coords_dir
+                source_img_files, target_img_files, source_coords_files
             )
         elif matching_strategy == NappingNavigator.MatchingStrategy.FILENAME:
             (
                 self._source_img_files,
                 self._target_img_files,
                 self._source_coords_files,
-            ) = self._match_filename(source_img_dir, target_img_dir, source_coords_dir)
+            ) = self._match_filename(
+                source_img_files, target_img_files, source_coords_files
+            )
         elif matching_strategy == NappingNavigator.MatchingStrategy.REGEX:
             assert source_regex is not None
             assert target_regex is not None
@@ -87,15 +125,13 @@ class NappingNavigator:
                 self._target_img_files,
                 self._source_coords_files,
             ) = self._match_regex(
-                source_img_dir,
+                source_img_files,
                 source_regex,
-                target_img_dir,
+                target_img_files,
                 target_regex,
-                source_coords_dir,
+                source_coords_files,
                 source_coords_regex,
             )
-        else:
-            raise ValueError(f"Unsupported file matching strategy: {matching_strategy}")
         self._control_points_files = [
             control_points_dir / f"{target_img_file.stem}.csv"
             for target_img_file in self._target_img_files
@@ -121,148 +157,138 @@ class NappingNavigator:
 
     @staticmethod
     def _match_alphabetical(
-        source_dir: Path,
-        target_dir: Path,
-        source_coords_dir: Optional[Path],
+        source_files: List[Path],
+        target_files: List[Path],
+        source_coords_files: Optional[List[Path]],
     ) -> Tuple[List[Path], List[Path], Optional[List[Path]]]:
-        source_files = sorted(
-            (f for f in source_dir.glob("*") if f.is_file()),
-            key=lambda f: f.stem,
-        )
-        target_files = sorted(
-            (f for f in target_dir.glob("*") if f.is_file()),
-            key=lambda f: f.stem,
-        )
+        source_files = NappingNavigator._sort_by_stem(source_files)
+        target_files = NappingNavigator._sort_by_stem(target_files)
         if len(target_files) != len(source_files):
             raise NappingException(
                 "Number of target images does not match " "the number of source images"
             )
-        if source_coords_dir is not None:
-            source_coords_files = sorted(
-                (f for f in source_coords_dir.glob("*") if f.is_file()),
-                key=lambda f: f.stem,
-            )
+        if source_coords_files is not None:
+            source_coords_files = NappingNavigator._sort_by_stem(source_coords_files)
             if len(source_coords_files) != len(source_files):
                 raise NappingException(
                     "Number of coordinate files does not match "
                     "the number of source images"
                 )
-        else:
-            source_coords_files = None
         return source_files, target_files, source_coords_files
 
-    @classmethod
+    @staticmethod
     def _match_filename(
-        cls,
-        source_dir: Path,
-        target_dir: Path,
-        soruce_coords_dir: Optional[Path],
+        source_files: List[Path],
+        target_files: List[Path],
+        source_coords_files: Optional[List[Path]],
     ) -> Tuple[List[Path], List[Path], Optional[List[Path]]]:
-        def match_target(target_file: Path, source_file: Path):
-            return target_file.stem == source_file.stem
-
-        def match_source_coords(source_coords_file: Path, source_file: Path):
-            return source_coords_file.stem == source_file.stem
-
-        return cls._match(
-            source_dir,
-            target_dir,
-            match_target,
-            soruce_coords_dir,
-            match_source_coords,
-        )
+        # specialization of _match for stem equality (no key function calls);
+        # reversed iteration, s.t. the first file wins for duplicate stems
+        target_files_by_stem = {f.stem: f for f in reversed(target_files)}
+        matched_source_files = []
+        matched_target_files = []
+        if source_coords_files is not None:
+            source_coords_files_by_stem = {
+                f.stem: f
+                for f in reversed(source_coords_files)
+                if f.suffix.lower() == ".csv"
+            }
+            matched_source_coords_files: Optional[List[Path]] = []
+            for source_file in source_files:
+                stem = source_file.stem
+                target_file = target_files_by_stem.get(stem)
+                source_coords_file = source_coords_files_by_stem.get(stem)
+                if target_file is not None and source_coords_file is not None:
+                    matched_source_files.append(source_file)
+                    matched_target_files.append(target_file)
+                    matched_source_coords_files.append(source_coords_file)
+        else:
+            matched_source_coords_files = None
+            for source_file in source_files:
+                target_file = target_files_by_stem.get(source_file.stem)
+                if target_file is not None:
+                    matched_source_files.append(source_file)
+                    matched_target_files.append(target_file)
+        return matched_source_files, matched_target_files, matched_source_coords_files
 
     @classmethod
     def _match_regex(
         cls,
-        source_dir: Path,
-        source_regex: str,
-        target_dir: Path,
-        target_regex: str,
-        source_coords_dir: Optional[Path],
-        source_coords_regex: Optional[str],
+        source_files: List[Path],
+        source_regex: Union[str, Pattern],
+        target_files: List[Path],
+        target_regex: Union[str, Pattern],
+        source_coords_files: Optional[List[Path]],
+        source_coords_regex: Union[str, Pattern, None],
     ) -> Tuple[List[Path], List[Path], Optional[List[Path]]]:
-        source_pattern = re.compile(source_regex)
-        target_pattern = re.compile(target_regex)
-
-        def match_target(target_file: Path, source_file: Path):
-            target_match = target_pattern.search(target_file.name)
-            source_match = source_pattern.search(source_file.name)
-            if target_match is not None and source_match is not None:
-                return target_match.group() == source_match.group()
-            return False
-
-        if source_coords_dir is not None and source_coords_regex is not None:
-            source_coords_pattern = re.compile(source_coords_regex)
-
-            def match_source_coords(source_coords_file: Path, source_file: Path):
-                source_coords_match = source_coords_pattern.search(
-                    source_coords_file.name
-                )
-                source_match = source_pattern.search(source_file.name)
-                if source_coords_match is not None and source_match is not None:
-                    return source_coords_match.group() == source_match.group()
-                return False
-
-            match_source_coords_func = match_source_coords
+        if source_coords_files is not None and source_coords_regex is not None:
+            source_coords_key = cls._create_regex_key(source_coords_regex)
         else:
-            match_source_coords_func = None
-
+            source_coords_key = None
         return cls._match(
-            source_dir,
-            target_dir,
-            match_target,
-            source_coords_dir,
-            match_source_coords_func,
+            source_files,
+            target_files,
+            cls._create_regex_key(source_regex),
+            cls._create_regex_key(target_regex),
+            source_coords_files,
+            source_coords_key,
         )
 
+    @staticmethod
+    def _create_regex_key(
+        regex: Union[str, Pattern],
+    ) -> Callable[[Path], Optional[Hashable]]:
+        # re.compile returns already compiled patterns as-is
+        search = re.compile(regex).search
+
+        def regex_key(file: Path) -> Optional[Hashable]:
+            match = search(file.name)
+            if match is not None:
+                return match.group()
+            return None
+
+        return regex_key
+
     @staticmethod
     def _match(
-        source_dir: Path,
-        target_dir: Path,
-        target_criterion: Callable[[Path, Path], bool],
-        source_coords_dir: Optional[Path],
-        source_coords_criterion: Optional[Callable[[Path, Path], bool]],
+        source_files: List[Path],
+        target_files: List[Path],
+        source_key: Callable[[Path], Optional[Hashable]],
+        target_key: Callable[[Path], Optional[Hashable]],
+        source_coords_files: Optional[List[Path]],
+        source_coords_key: Optional[Callable[[Path], Optional[Hashable]]],
     ) -> Tuple[List[Path], List[Path], Optional[List[Path]]]:
-        source_files = [f for f in source_dir.glob("*") if f.is_file()]
-        target_files = [f for f in target_dir.glob("*") if f.is_file()]
-        if source_coords_dir is not None:
-            source_coords_files = [
-                f
-                for f in source_coords_dir.glob("*")
-                if f.is_file() and f.suffix.lower() == ".csv"
-            ]
+        # index target/coordinate files by key once (first file wins), so that
+        # matching is a single pass over the source files instead of O(N*M)
+        target_files_by_key: Dict[Hashable, Path] = {}
+        for target_file in target_files:
+            key = target_key(target_file)
+            if key is not None:
+                target_files_by_key.setdefault(key, target_file)
+        if source_coords_files is not None and source_coords_key is not None:
+            source_coords_files_by_key: Optional[Dict[Hashable, Path]] = {}
+            for source_coords_file in source_coords_files:
+                if source_coords_file.suffix.lower() == ".csv":
+                    key = source_coords_key(source_coords_file)
+                    if key is not None:
+                        source_coords_files_by_key.setdefault(key, source_coords_file)
         else:
-            source_coords_files = None
+            source_coords_files_by_key = None
         matched_source_files = []
         matched_target_files = []
-        if source_coords_files is not None:
+        if source_coords_files_by_key is not None:
             matched_source_coords_files: Optional[List[Path]] = []
         else:
             matched_source_coords_files = None
         for matched_source_file in source_files:
-            matched_target_file = next(
-                (
-                    target_file
-                    for target_file in target_files
-                    if target_criterion(target_file, matched_source_file)
-                ),
-                None,
-            )
+            key = source_key(matched_source_file)
+            if key is None:
+                continue
+            matched_target_file = target_files_by_key.get(key)
             if matched_target_file is None:
                 continue
-            if source_coords_files is not None:
-                assert source_coords_criterion is not None
-                matched_source_coords_file = next(
-                    (
-                        source_coords_file
-                        for source_coords_file in source_coords_files
-                        if source_coords_criterion(
-                            source_coords_file, matched_source_file
-                        )
-                    ),
-                    None,
-                )
+            if source_coords_files_by_key is not None:
+                matched_source_coords_file = source_coords_files_by_key.get(key)
                 if matched_source_coords_file is None:
                     continue
             else:
@@ -278,6 +304,18 @@ class NappingNavigator:
             matched_source_coords_files,
         )
 
+    @staticmethod
+    def _list_files(dir: Path) -> List[Path]:
+        # DirEntry.is_file() uses the file type reported by the directory scan,
+        # avoiding an additional stat() call per file on most platforms
+        with os.scandir(dir) as it:
+            return [Path(entry.path) for entry in it if entry.is_file()]
+
+    @staticmethod
+    def _sort_by_stem(files: List[Path]) -> List[Path]:
+        # stable sort, i.e. files with equal stems keep their listing order
+        return sorted(files, key=attrgetter("stem"))
+
     def __len__(self) -> int:
         if self._source_img_files is None:
             return 0
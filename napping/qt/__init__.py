@@ -1,5 +1,18 @@
+from typing import TYPE_CHECKING
+
 from ._napping_dialog import NappingDialog
-from ._napping_viewer import NappingViewer
 from ._napping_widget import NappingWidget
 
+if TYPE_CHECKING:
+    from ._napping_viewer import NappingViewer
+
 __all__ = ["NappingDialog", "NappingViewer", "NappingWidget"]
+
+
+def __getattr__(name: str):
+    # importing napari is slow, so defer it until the first viewer is created
+    if name == "NappingViewer":
+        from ._napping_viewer import NappingViewer
+
+        return NappingViewer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 
 from qtpy.QtWidgets import QFileDialog, QLineEdit, QStyle
 
@@ -7,8 +7,19 @@ from qtpy.QtWidgets import QFileDialog, QLineEdit, QStyle
 class FileLineEdit(QLineEdit):
     def __init__(self, check_exists: bool = False, **line_edit_kwargs) -> None:
         super(FileLineEdit, self).__init__(**line_edit_kwargs)
-        self._file_dialog = QFileDialog(self)
-        self._file_dialog.setOption(QFileDialog.Option.DontUseNativeDialog)
+        # QFileDialog construction is expensive (especially on Windows), so the
+        # file dialog is only created when browsing; until then, its
+        # configuration is recorded and applied upon creation
+        self._file_dialog: Optional[QFileDialog] = None
+        self._dialog_window_title = ""
+        self._dialog_file_mode = QFileDialog.FileMode.AnyFile
+        self._dialog_name_filter: Optional[str] = None
+        self._dialog_default_suffix: Optional[str] = None
+        # applied when browsing, since QFileDialog.setDirectory accesses the disk
+        self._pending_dialog_directory: Optional[str] = None
+        self._dialog_options: Dict[QFileDialog.Option, bool] = {
+            QFileDialog.Option.DontUseNativeDialog: True
+        }
         self._browse_action = self.addAction(
             self.style().standardIcon(QStyle.StandardPixmap.SP_DirOpenIcon),
             QLineEdit.ActionPosition.LeadingPosition,
@@ -23,15 +34,60 @@ class FileLineEdit(QLineEdit):
     def set_path(self, path: Optional[Path]) -> None:
         self.setText(str(path) if path is not None else "")
 
+    def set_dialog_window_title(self, window_title: str) -> None:
+        self._dialog_window_title = window_title
+        if self._file_dialog is not None:
+            self._file_dialog.setWindowTitle(window_title)
+
+    def set_dialog_file_mode(self, file_mode: QFileDialog.FileMode) -> None:
+        self._dialog_file_mode = file_mode
+        if self._file_dialog is not None:
+            self._file_dialog.setFileMode(file_mode)
+
+    def set_dialog_name_filter(self, name_filter: Optional[str]) -> None:
+        self._dialog_name_filter = name_filter
+        if self._file_dialog is not None:
+            self._file_dialog.setNameFilter(name_filter)
+
+    def set_dialog_default_suffix(self, default_suffix: Optional[str]) -> None:
+        self._dialog_default_suffix = default_suffix
+        if self._file_dialog is not None:
+            self._file_dialog.setDefaultSuffix(default_suffix)
+
+    def set_dialog_directory(self, directory: str) -> None:
+        self._pending_dialog_directory = directory
+
+    def set_dialog_option(self, option: QFileDialog.Option, on: bool = True) -> None:
+        self._dialog_options[option] = on
+        if self._file_dialog is not None:
+            self._file_dialog.setOption(option, on)
+
+    def _create_file_dialog(self) -> QFileDialog:
+        file_dialog = QFileDialog(self)
+        file_dialog.setWindowTitle(self._dialog_window_title)
+        # setFileMode resets some options (e.g. ShowDirsOnly), so set it first
+        file_dialog.setFileMode(self._dialog_file_mode)
+        for option, on in self._dialog_options.items():
+            file_dialog.setOption(option, on)
+        if self._dialog_name_filter is not None:
+            file_dialog.setNameFilter(self._dialog_name_filter)
+        if self._dialog_default_suffix is not None:
+            file_dialog.setDefaultSuffix(self._dialog_default_suffix)
+        return file_dialog
+
     def _on_browse_action_triggered(self, checked=False) -> None:
+        file_dialog = self.file_dialog
+        if self._pending_dialog_directory is not None:
+            file_dialog.setDirectory(self._pending_dialog_directory)
+            self._pending_dialog_directory = None
         path = self.get_path()
         if path is not None:
             if path.parent.is_dir():
-                self._file_dialog.setDirectory(str(path.parent))
+                file_dialog.setDirectory(str(path.parent))
             if path.exists():
-                self._file_dialog.selectFile(str(path))
-        if self._file_dialog.exec() == QFileDialog.DialogCode.Accepted:
-            selected_files = self._file_dialog.selectedFiles()
+                file_dialog.selectFile(str(path))
+        if file_dialog.exec() == QFileDialog.DialogCode.Accepted:
+            selected_files = file_dialog.selectedFiles()
             self.setText(selected_files[0])
 
     def _on_text_changed(self, text) -> None:
@@ -42,4 +98,6 @@ class FileLineEdit(QLineEdit):
 
     @property
     def file_dialog(self) -> QFileDialog:
+        if self._file_dialog is None:
+            self._file_dialog = self._create_file_dialog()
         return self._file_dialog
@@ -1,9 +1,15 @@
+import itertools
+import os
+import re
+import stat
+import sys
 from enum import Enum, IntEnum
+from functools import lru_cache
 from os import PathLike
 from pathlib import Path
-from typing import Optional, Union
+from typing import Any, Dict, Optional, Pattern, Tuple, Union
 
-from qtpy.QtCore import QSettings, Qt
+from qtpy.QtCore import QSettings, Qt, QTimer
 from qtpy.QtWidgets import (
     QButtonGroup,
     QComboBox,
@@ -21,6 +27,24 @@ from qtpy.QtWidgets import (
 
 from ._file_line_edit import FileLineEdit
 
+# shared by all dialogs and only ever increasing, s.t. a new dialog (or a new
+# edit) never sees stat results cached for a previous generation
+_stat_generations = itertools.count()
+
+
+@lru_cache(maxsize=64)
+def _stat_kind(path: str, generation: int) -> Optional[str]:
+    # generation invalidates cached results after edits (see NappingDialog)
+    try:
+        st_mode = os.stat(path).st_mode
+    except (OSError, ValueError):
+        return None
+    if stat.S_ISREG(st_mode):
+        return "file"
+    if stat.S_ISDIR(st_mode):
+        return "dir"
+    return None
+
 
 class NappingDialog(QDialog):
     class SelectionMode(IntEnum):
@@ -37,20 +61,45 @@ class NappingDialog(QDialog):
         SIMILARITY = "Similarity (Euclidean transform + uniform scaling)"
         AFFINE = "Affine (Similarity transform + non-uniform scaling + shear)"
 
-    SELECTION_MODE_SETTING = "registrationDialog/selectionMode"
-    MATCHING_STRATEGY_SETTING = "registrationDialog/matchingStrategy"
-    SOURCE_IMG_PATH_SETTING = "registrationDialog/sourceImages"
-    SOURCE_IMG_REGEX_SETTING = "registrationDialog/sourceRegex"
-    TARGET_IMG_PATH_SETTING = "registrationDialog/targetImages"
-    TARGET_IMG_REGEX_SETTING = "registrationDialog/targetRegex"
-    CONTROL_POINTS_PATH_SETTING = "registrationDialog/controlPointsDest"
-    JOINT_TRANSFORM_PATH_SETTING = "registrationDialog/jointTransformDest"
-    TRANSFORM_TYPE_SETTING = "registrationDialog/transformType"
-    SOURCE_COORDS_PATH_SETTING = "registrationDialog/sourceCoords"
-    SOURCE_COORDS_REGEX_SETTING = "registrationDialog/sourceCoordsRegex"
-    TRANSF_COORDS_PATH_SETTING = "registrationDialog/transformedCoordsDest"
-    PRE_TRANSFORM_SETTING = "registrationDialog/preTransformFile"
-    POST_TRANSFORM_SETTING = "registrationDialog/postTransformFile"
+    _REGEX_LABEL_TEXT = "        RegEx:"
+    _INVALID_REGEX_STYLE_SHEET = "background-color: #88ff0000"
+
+    SETTINGS_GROUP = "registrationDialog"
+    SELECTION_MODE_SETTING = sys.intern("registrationDialog/selectionMode")
+    MATCHING_STRATEGY_SETTING = sys.intern("registrationDialog/matchingStrategy")
+    SOURCE_IMG_PATH_SETTING = sys.intern("registrationDialog/sourceImages")
+    SOURCE_IMG_REGEX_SETTING = sys.intern("registrationDialog/sourceRegex")
+    TARGET_IMG_PATH_SETTING = sys.intern("registrationDialog/targetImages")
+    TARGET_IMG_REGEX_SETTING = sys.intern("registrationDialog/targetRegex")
+    CONTROL_POINTS_PATH_SETTING = sys.intern("registrationDialog/controlPointsDest")
+    JOINT_TRANSFORM_PATH_SETTING = sys.intern("registrationDialog/jointTransformDest")
+    TRANSFORM_TYPE_SETTING = sys.intern("registrationDialog/transformType")
+    SOURCE_COORDS_PATH_SETTING = sys.intern("registrationDialog/sourceCoords")
+    SOURCE_COORDS_REGEX_SETTING = sys.intern("registrationDialog/sourceCoordsRegex")
+    TRANSF_COORDS_PATH_SETTING = sys.intern("registrationDialog/transformedCoordsDest")
+    PRE_TRANSFORM_SETTING = sys.intern("registrationDialog/preTransformFile")
+    POST_TRANSFORM_SETTING = sys.intern("registrationDialog/postTransformFile")
+
+    # maps keys within SETTINGS_GROUP to the (interned) setting constants
+    _SETTINGS_BY_KEY = {
+        setting.partition("/")[2]: setting
+        for setting in (
+            SELECTION_MODE_SETTING,
+            MATCHING_STRATEGY_SETTING,
+            SOURCE_IMG_PATH_SETTING,
+            SOURCE_IMG_REGEX_SETTING,
+            TARGET_IMG_PATH_SETTING,
+            TARGET_IMG_REGEX_SETTING,
+            CONTROL_POINTS_PATH_SETTING,
+            JOINT_TRANSFORM_PATH_SETTING,
+            TRANSFORM_TYPE_SETTING,
+            SOURCE_COORDS_PATH_SETTING,
+            SOURCE_COORDS_REGEX_SETTING,
+            TRANSF_COORDS_PATH_SETTING,
+            PRE_TRANSFORM_SETTING,
+            POST_TRANSFORM_SETTING,
+        )
+    }
 
     DEFAULT_SELECTION_MODE = SelectionMode.FILE
     DEFAULT_MATCHING_STRATEGY = MatchingStrategy.FILENAME
@@ -67,15 +116,29 @@ class NappingDialog(QDialog):
     DEFAULT_PRE_TRANSFORM = ""
     DEFAULT_POST_TRANSFORM = ""
 
+    REFRESH_DELAY_MSEC = 100
+
     def __init__(self, **dialog_kwargs) -> None:
         super(NappingDialog, self).__init__(**dialog_kwargs)
         self._settings = QSettings("Bodenmiller Lab", "napping")
+        self._loaded_settings = self._load_settings()
+
+        self._stat_generation = next(_stat_generations)
+        self._last_applied_selection_mode: Optional[NappingDialog.SelectionMode] = None
+        self._last_applied_dir_selection_mode: Optional[bool] = None
+        self._last_applied_regex_widgets_enabled: Optional[bool] = None
+        self._is_valid_cache: Optional[Tuple[Tuple, bool]] = None
+        # coalesce refreshes triggered by bursts of keystrokes
+        self._pending_refresh_last_path: Union[str, PathLike, None] = None
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(self.REFRESH_DELAY_MSEC)
+        self._refresh_timer.timeout.connect(self._on_refresh_timer_timeout)
 
         selection_mode = NappingDialog.SelectionMode(
             int(
-                self._settings.value(
-                    self.SELECTION_MODE_SETTING,
-                    defaultValue=self.DEFAULT_SELECTION_MODE.value,
+                self._loaded_settings.get(
+                    self.SELECTION_MODE_SETTING, self.DEFAULT_SELECTION_MODE.value
                 )
             )
         )
@@ -96,186 +159,107 @@ class NappingDialog(QDialog):
         self._selection_mode_buttons.addButton(
             self._dir_selection_mode_button, NappingDialog.SelectionMode.DIR
         )
-        self._selection_mode_buttons.buttonClicked.connect(lambda _: self.refresh())
+        self._selection_mode_buttons.buttonClicked.connect(self._on_selection_changed)
 
-        matching_strategy_str = self._settings.value(
-            self.MATCHING_STRATEGY_SETTING,
-            defaultValue=self.DEFAULT_MATCHING_STRATEGY.value,
+        matching_strategy_str = self._loaded_settings.get(
+            self.MATCHING_STRATEGY_SETTING, self.DEFAULT_MATCHING_STRATEGY.value
         )
         self._matching_strategy_combo_box = QComboBox(self)
-        self._matching_strategy_combo_box.addItems(
-            [x.value for x in NappingDialog.MatchingStrategy]
-        )
+        for matching_strategy in NappingDialog.MatchingStrategy:
+            self._matching_strategy_combo_box.addItem(
+                matching_strategy.value, matching_strategy
+            )
         self._matching_strategy_combo_box.setCurrentText(matching_strategy_str)
         self._matching_strategy_combo_box.currentIndexChanged.connect(
-            lambda _: self.refresh()
+            self._on_selection_changed
         )
 
-        source_img_path_str = str(
-            self._settings.value(
-                self.SOURCE_IMG_PATH_SETTING,
-                defaultValue=self.DEFAULT_SOURCE_IMG_PATH,
-            )
+        self._source_img_path_edit = self._create_path_edit(
+            self.SOURCE_IMG_PATH_SETTING,
+            self.DEFAULT_SOURCE_IMG_PATH,
+            "Select source image(s)",
+            check_exists=True,
         )
-        self._source_img_path_edit = FileLineEdit(check_exists=True, parent=self)
-        self._source_img_path_edit.file_dialog.setWindowTitle("Select source image(s)")
-        self._source_img_path_edit.setText(source_img_path_str)
-        self._source_img_path_edit.textChanged.connect(lambda text: self.refresh(text))
 
-        source_regex = str(
-            self._settings.value(
-                self.SOURCE_IMG_REGEX_SETTING,
-                defaultValue=self.DEFAULT_SOURCE_IMG_REGEX,
-            )
+        self._source_regex_label = QLabel(self._REGEX_LABEL_TEXT)
+        self._source_regex_edit = self._create_regex_edit(
+            self.SOURCE_IMG_REGEX_SETTING, self.DEFAULT_SOURCE_IMG_REGEX
         )
-        self._source_regex_label = QLabel("        RegEx:")
-        self._source_regex_edit = QLineEdit(self)
-        self._source_regex_edit.setText(source_regex)
-        self._source_regex_edit.textChanged.connect(lambda _: self.refresh())
 
-        target_img_path_str = str(
-            self._settings.value(
-                self.TARGET_IMG_PATH_SETTING,
-                defaultValue=self.DEFAULT_TARGET_IMG_PATH,
-            )
+        self._target_img_path_edit = self._create_path_edit(
+            self.TARGET_IMG_PATH_SETTING,
+            self.DEFAULT_TARGET_IMG_PATH,
+            "Select target image(s)",
+            check_exists=True,
         )
-        self._target_img_path_edit = FileLineEdit(check_exists=True, parent=self)
-        self._target_img_path_edit.file_dialog.setWindowTitle("Select target image(s)")
-        self._target_img_path_edit.setText(target_img_path_str)
-        self._target_img_path_edit.textChanged.connect(lambda text: self.refresh(text))
 
-        target_regex = str(
-            self._settings.value(
-                self.TARGET_IMG_REGEX_SETTING,
-                defaultValue=self.DEFAULT_TARGET_IMG_REGEX,
-            )
+        self._target_regex_label = QLabel(self._REGEX_LABEL_TEXT)
+        self._target_regex_edit = self._create_regex_edit(
+            self.TARGET_IMG_REGEX_SETTING, self.DEFAULT_TARGET_IMG_REGEX
         )
-        self._target_regex_label = QLabel("        RegEx:")
-        self._target_regex_edit = QLineEdit(self)
-        self._target_regex_edit.setText(target_regex)
-        self._target_regex_edit.textChanged.connect(lambda _: self.refresh())
 
-        control_points_path_str = str(
-            self._settings.value(
-                self.CONTROL_POINTS_PATH_SETTING,
-                defaultValue=self.DEFAULT_CONTROL_POINTS_PATH,
-            )
-        )
-        self._control_points_path_edit = FileLineEdit(parent=self)
-        self._control_points_path_edit.file_dialog.setWindowTitle(
-            "Select control points destination"
-        )
-        self._control_points_path_edit.setText(control_points_path_str)
-        self._control_points_path_edit.textChanged.connect(
-            lambda text: self.refresh(text)
+        self._control_points_path_edit = self._create_path_edit(
+            self.CONTROL_POINTS_PATH_SETTING,
+            self.DEFAULT_CONTROL_POINTS_PATH,
+            "Select control points destination",
         )
 
-        joint_transform_path_str = str(
-            self._settings.value(
-                self.JOINT_TRANSFORM_PATH_SETTING,
-                defaultValue=self.DEFAULT_JOINT_TRANSFORM_PATH,
-            )
-        )
-        self._joint_transform_path_edit = FileLineEdit(parent=self)
-        self._joint_transform_path_edit.file_dialog.setWindowTitle(
-            "Select joint transform destination"
-        )
-        self._joint_transform_path_edit.setText(joint_transform_path_str)
-        self._joint_transform_path_edit.textChanged.connect(
-            lambda text: self.refresh(text)
+        self._joint_transform_path_edit = self._create_path_edit(
+            self.JOINT_TRANSFORM_PATH_SETTING,
+            self.DEFAULT_JOINT_TRANSFORM_PATH,
+            "Select joint transform destination",
         )
 
         transform_type_str = str(
-            self._settings.value(
-                self.TRANSFORM_TYPE_SETTING,
-                defaultValue=self.DEFAULT_TRANSFORM_TYPE,
+            self._loaded_settings.get(
+                self.TRANSFORM_TYPE_SETTING, self.DEFAULT_TRANSFORM_TYPE
             )
         )
         self._transform_type_combo_box = QComboBox(self)
-        self._transform_type_combo_box.addItems(
-            [x.value for x in NappingDialog.TransformType]
-        )
+        for transform_type in NappingDialog.TransformType:
+            self._transform_type_combo_box.addItem(transform_type.value, transform_type)
         self._transform_type_combo_box.setCurrentText(transform_type_str)
         self._transform_type_combo_box.currentIndexChanged.connect(
-            lambda _: self.refresh()
+            self._on_selection_changed
         )
 
-        source_coords_path_str = str(
-            self._settings.value(
-                self.SOURCE_COORDS_PATH_SETTING,
-                defaultValue=self.DEFAULT_SOURCE_COORDS_PATH,
-            )
-        )
-        self._source_coords_path_edit = FileLineEdit(check_exists=True, parent=self)
-        self._source_coords_path_edit.file_dialog.setWindowTitle(
-            "Select source coordinates"
-        )
-        self._source_coords_path_edit.setText(source_coords_path_str)
-        self._source_coords_path_edit.textChanged.connect(
-            lambda text: self.refresh(text)
+        self._source_coords_path_edit = self._create_path_edit(
+            self.SOURCE_COORDS_PATH_SETTING,
+            self.DEFAULT_SOURCE_COORDS_PATH,
+            "Select source coordinates",
+            check_exists=True,
         )
 
-        source_coords_regex = str(
-            self._settings.value(
-                self.SOURCE_COORDS_REGEX_SETTING,
-                defaultValue=self.DEFAULT_SOURCE_COORDS_REGEX,
-            )
+        self._source_coords_regex_label = QLabel(self._REGEX_LABEL_TEXT)
+        self._source_coords_regex_edit = self._create_regex_edit(
+            self.SOURCE_COORDS_REGEX_SETTING, self.DEFAULT_SOURCE_COORDS_REGEX
         )
-        self._source_coords_regex_label = QLabel("        RegEx:")
-        self._source_coords_regex_edit = QLineEdit(self)
-        self._source_coords_regex_edit.setText(source_coords_regex)
-        self._source_coords_regex_edit.textChanged.connect(lambda _: self.refresh())
 
-        transf_coords_path_str = str(
-            self._settings.value(
-                self.TRANSF_COORDS_PATH_SETTING,
-                defaultValue=self.DEFAULT_TRANSF_COORDS_PATH,
-            )
-        )
-        self._transf_coords_path_edit = FileLineEdit(parent=self)
-        self._transf_coords_path_edit.file_dialog.setWindowTitle(
-            "Select transf. coordinates destination"
-        )
-        self._transf_coords_path_edit.setText(transf_coords_path_str)
-        self._transf_coords_path_edit.textChanged.connect(
-            lambda text: self.refresh(text)
+        self._transf_coords_path_edit = self._create_path_edit(
+            self.TRANSF_COORDS_PATH_SETTING,
+            self.DEFAULT_TRANSF_COORDS_PATH,
+            "Select transf. coordinates destination",
         )
 
-        pre_transform_file_str = str(
-            self._settings.value(
-                self.PRE_TRANSFORM_SETTING,
-                defaultValue=self.DEFAULT_PRE_TRANSFORM,
-            )
+        self._pre_transform_file_edit = self._create_path_edit(
+            self.PRE_TRANSFORM_SETTING,
+            self.DEFAULT_PRE_TRANSFORM,
+            "Select pre-transform",
         )
-        self._pre_transform_file_edit = FileLineEdit(parent=self)
-        self._pre_transform_file_edit.file_dialog.setWindowTitle("Select pre-transform")
-        self._pre_transform_file_edit.setText(pre_transform_file_str)
-        self._pre_transform_file_edit.file_dialog.setFileMode(
+        self._pre_transform_file_edit.set_dialog_file_mode(
             QFileDialog.FileMode.ExistingFile
         )
-        self._pre_transform_file_edit.file_dialog.setNameFilter("Numpy files (*.npy)")
-        self._pre_transform_file_edit.textChanged.connect(
-            lambda text: self.refresh(text)
-        )
+        self._pre_transform_file_edit.set_dialog_name_filter("Numpy files (*.npy)")
 
-        post_transform_file_str = str(
-            self._settings.value(
-                self.POST_TRANSFORM_SETTING,
-                defaultValue=self.DEFAULT_POST_TRANSFORM,
-            )
-        )
-        self._post_transform_file_edit = FileLineEdit(parent=self)
-        self._post_transform_file_edit.file_dialog.setWindowTitle(
-            "Select post-transform"
+        self._post_transform_file_edit = self._create_path_edit(
+            self.POST_TRANSFORM_SETTING,
+            self.DEFAULT_POST_TRANSFORM,
+            "Select post-transform",
         )
-        self._post_transform_file_edit.file_dialog.setFileMode(
+        self._post_transform_file_edit.set_dialog_file_mode(
             QFileDialog.FileMode.ExistingFile
         )
-        self._post_transform_file_edit.file_dialog.setNameFilter("Numpy files (*.npy)")
-        self._post_transform_file_edit.setText(post_transform_file_str)
-        self._post_transform_file_edit.textChanged.connect(
-            lambda text: self.refresh(text)
-        )
+        self._post_transform_file_edit.set_dialog_name_filter("Numpy files (*.npy)")
 
         self._button_box = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel,
@@ -354,22 +338,48 @@ class NappingDialog(QDialog):
         self.setMinimumWidth(600)
         self.refresh()
 
+    def _create_path_edit(
+        self,
+        setting: str,
+        default_value: str,
+        window_title: str,
+        check_exists: bool = False,
+    ) -> FileLineEdit:
+        path_edit = FileLineEdit(check_exists=check_exists, parent=self)
+        path_edit.set_dialog_window_title(window_title)
+        path_edit.setText(str(self._loaded_settings.get(setting, default_value)))
+        path_edit.textChanged.connect(self._schedule_refresh)
+        return path_edit
+
+    def _create_regex_edit(self, setting: str, default_value: str) -> QLineEdit:
+        regex_edit = QLineEdit(self)
+        regex_edit.setText(str(self._loaded_settings.get(setting, default_value)))
+        regex_edit.textChanged.connect(self._on_regex_edit_text_changed)
+        return regex_edit
+
     def refresh(self, last_path: Union[str, PathLike, None] = None) -> None:
+        if self._refresh_timer.isActive():
+            self._refresh_timer.stop()
+            last_path = last_path or self._pending_refresh_last_path
+        self._pending_refresh_last_path = None
         if last_path:
-            directory = str(Path(last_path).parent)
-            self._source_img_path_edit.file_dialog.setDirectory(directory)
-            self._target_img_path_edit.file_dialog.setDirectory(directory)
-            self._control_points_path_edit.file_dialog.setDirectory(directory)
-            self._joint_transform_path_edit.file_dialog.setDirectory(directory)
-            self._source_coords_path_edit.file_dialog.setDirectory(directory)
-            self._transf_coords_path_edit.file_dialog.setDirectory(directory)
-            self._pre_transform_file_edit.file_dialog.setDirectory(directory)
-            self._post_transform_file_edit.file_dialog.setDirectory(directory)
-
-        if self.selection_mode in (
-            NappingDialog.SelectionMode.FILE,
-            NappingDialog.SelectionMode.DIR,
+            directory = os.path.dirname(os.fspath(last_path))
+            self._source_img_path_edit.set_dialog_directory(directory)
+            self._target_img_path_edit.set_dialog_directory(directory)
+            self._control_points_path_edit.set_dialog_directory(directory)
+            self._joint_transform_path_edit.set_dialog_directory(directory)
+            self._source_coords_path_edit.set_dialog_directory(directory)
+            self._transf_coords_path_edit.set_dialog_directory(directory)
+            self._pre_transform_file_edit.set_dialog_directory(directory)
+            self._post_transform_file_edit.set_dialog_directory(directory)
+
+        # file dialogs only need to be reconfigured when the selection mode changes
+        if (
+            self.selection_mode
+            in (NappingDialog.SelectionMode.FILE, NappingDialog.SelectionMode.DIR)
+            and self.selection_mode != self._last_applied_selection_mode
         ):
+            self._last_applied_selection_mode = self.selection_mode
             if self.selection_mode == NappingDialog.SelectionMode.FILE:
                 any_file_mode = QFileDialog.FileMode.AnyFile
                 existing_file_mode = QFileDialog.FileMode.ExistingFile
@@ -395,209 +405,293 @@ class NappingDialog(QDialog):
                 transf_coords_default_suffix = None
                 show_dirs_only = True
 
-            self._source_img_path_edit.file_dialog.setFileMode(existing_file_mode)
-            self._source_img_path_edit.file_dialog.setOption(
+            self._source_img_path_edit.set_dialog_file_mode(existing_file_mode)
+            self._source_img_path_edit.set_dialog_option(
                 QFileDialog.Option.ShowDirsOnly, show_dirs_only
             )
 
-            self._target_img_path_edit.file_dialog.setFileMode(existing_file_mode)
-            self._target_img_path_edit.file_dialog.setOption(
+            self._target_img_path_edit.set_dialog_file_mode(existing_file_mode)
+            self._target_img_path_edit.set_dialog_option(
                 QFileDialog.Option.ShowDirsOnly, show_dirs_only
             )
 
-            self._control_points_path_edit.file_dialog.setFileMode(any_file_mode)
-            self._control_points_path_edit.file_dialog.setNameFilter(
+            self._control_points_path_edit.set_dialog_file_mode(any_file_mode)
+            self._control_points_path_edit.set_dialog_name_filter(
                 control_points_name_filter
             )
-            self._control_points_path_edit.file_dialog.setDefaultSuffix(
+            self._control_points_path_edit.set_dialog_default_suffix(
                 control_points_default_suffix
             )
-            self._control_points_path_edit.file_dialog.setOption(
+            self._control_points_path_edit.set_dialog_option(
                 QFileDialog.Option.ShowDirsOnly, show_dirs_only
             )
 
-            self._joint_transform_path_edit.file_dialog.setFileMode(any_file_mode)
-            self._joint_transform_path_edit.file_dialog.setNameFilter(
+            self._joint_transform_path_edit.set_dialog_file_mode(any_file_mode)
+            self._joint_transform_path_edit.set_dialog_name_filter(
                 transform_name_filter
             )
-            self._joint_transform_path_edit.file_dialog.setDefaultSuffix(
+            self._joint_transform_path_edit.set_dialog_default_suffix(
                 transform_default_suffix
             )
-            self._joint_transform_path_edit.file_dialog.setOption(
+            self._joint_transform_path_edit.set_dialog_option(
                 QFileDialog.Option.ShowDirsOnly, show_dirs_only
             )
 
-            self._source_coords_path_edit.file_dialog.setFileMode(existing_file_mode)
-            self._source_coords_path_edit.file_dialog.setNameFilter(
+            self._source_coords_path_edit.set_dialog_file_mode(existing_file_mode)
+            self._source_coords_path_edit.set_dialog_name_filter(
                 source_coords_name_filter
             )
-            self._source_coords_path_edit.file_dialog.setDefaultSuffix(
+            self._source_coords_path_edit.set_dialog_default_suffix(
                 source_coords_default_suffix
             )
-            self._source_coords_path_edit.file_dialog.setOption(
+            self._source_coords_path_edit.set_dialog_option(
                 QFileDialog.Option.ShowDirsOnly, show_dirs_only
             )
 
-            self._transf_coords_path_edit.file_dialog.setFileMode(any_file_mode)
-            self._transf_coords_path_edit.file_dialog.setNameFilter(
+            self._transf_coords_path_edit.set_dialog_file_mode(any_file_mode)
+            self._transf_coords_path_edit.set_dialog_name_filter(
                 transf_coords_name_filter
             )
-            self._transf_coords_path_edit.file_dialog.setDefaultSuffix(
+            self._transf_coords_path_edit.set_dialog_default_suffix(
                 transf_coords_default_suffix
             )
-            self._transf_coords_path_edit.file_dialog.setOption(
+            self._transf_coords_path_edit.set_dialog_option(
                 QFileDialog.Option.ShowDirsOnly, show_dirs_only
             )
 
-        if self.selection_mode == NappingDialog.SelectionMode.DIR:
-            self._matching_strategy_combo_box.setEnabled(True)
-        else:
-            self._matching_strategy_combo_box.setEnabled(False)
-
         dir_selection_mode = self.selection_mode == NappingDialog.SelectionMode.DIR
         regex_matching_strategy = (
             self.matching_strategy == NappingDialog.MatchingStrategy.REGEX
         )
-        self._source_regex_label.setEnabled(
-            dir_selection_mode and regex_matching_strategy
-        )
-        self._source_regex_edit.setEnabled(
-            dir_selection_mode and regex_matching_strategy
-        )
-        self._target_regex_label.setEnabled(
-            dir_selection_mode and regex_matching_strategy
-        )
-        self._target_regex_edit.setEnabled(
-            dir_selection_mode and regex_matching_strategy
-        )
-        self._source_coords_regex_label.setEnabled(
-            dir_selection_mode and regex_matching_strategy
-        )
-        self._source_coords_regex_edit.setEnabled(
-            dir_selection_mode and regex_matching_strategy
-        )
+        regex_widgets_enabled = dir_selection_mode and regex_matching_strategy
+        if dir_selection_mode != self._last_applied_dir_selection_mode:
+            self._last_applied_dir_selection_mode = dir_selection_mode
+            self._matching_strategy_combo_box.setEnabled(dir_selection_mode)
+        if regex_widgets_enabled != self._last_applied_regex_widgets_enabled:
+            self._last_applied_regex_widgets_enabled = regex_widgets_enabled
+            self._source_regex_label.setEnabled(regex_widgets_enabled)
+            self._source_regex_edit.setEnabled(regex_widgets_enabled)
+            self._target_regex_label.setEnabled(regex_widgets_enabled)
+            self._target_regex_edit.setEnabled(regex_widgets_enabled)
+            self._source_coords_regex_label.setEnabled(regex_widgets_enabled)
+            self._source_coords_regex_edit.setEnabled(regex_widgets_enabled)
+
+        self._refresh_regex_edit_style_sheet(self._source_regex_edit)
+        self._refresh_regex_edit_style_sheet(self._target_regex_edit)
+        self._refresh_regex_edit_style_sheet(self._source_coords_regex_edit)
 
         self._button_box.button(QDialogButtonBox.StandardButton.Ok).setEnabled(
             self.is_valid()
         )
 
+    def _refresh_regex_edit_style_sheet(self, regex_edit: QLineEdit) -> None:
+        # compiled patterns are cached, so validating on refresh is cheap
+        try:
+            self._compile_regex(regex_edit.text() or None)
+            style_sheet = ""
+        except re.error:
+            style_sheet = self._INVALID_REGEX_STYLE_SHEET
+        if regex_edit.styleSheet() != style_sheet:
+            regex_edit.setStyleSheet(style_sheet)
+
     def is_valid(self) -> bool:
-        if self.selection_mode == NappingDialog.SelectionMode.FILE:
-            if self.source_img_path is None or not self.source_img_path.is_file():
-                return False
-            if self.target_img_path is None or not self.target_img_path.is_file():
+        # the stat generation changes whenever paths are edited (see _stat_kind)
+        is_valid_key = (
+            self._stat_generation,
+            self._selection_mode_buttons.checkedId(),
+            self._matching_strategy_combo_box.currentText(),
+            self._source_img_path_edit.text(),
+            self._source_regex_edit.text(),
+            self._target_img_path_edit.text(),
+            self._target_regex_edit.text(),
+            self._control_points_path_edit.text(),
+            self._joint_transform_path_edit.text(),
+            self._source_coords_path_edit.text(),
+            self._source_coords_regex_edit.text(),
+            self._transf_coords_path_edit.text(),
+            self._pre_transform_file_edit.text(),
+            self._post_transform_file_edit.text(),
+        )
+        if self._is_valid_cache is None or self._is_valid_cache[0] != is_valid_key:
+            self._is_valid_cache = (is_valid_key, self._is_valid())
+        return self._is_valid_cache[1]
+
+    def _is_valid(self) -> bool:
+        selection_mode = self.selection_mode
+        matching_strategy = self.matching_strategy
+        source_img_path = self.source_img_path
+        target_img_path = self.target_img_path
+        control_points_path = self.control_points_path
+        joint_transform_path = self.joint_transform_path
+        source_coords_path = self.source_coords_path
+        transf_coords_path = self.transf_coords_path
+        pre_transform_path = self.pre_transform_path
+        post_transform_path = self.post_transform_path
+        source_regex = self.source_regex
+        target_regex = self.target_regex
+        source_coords_regex = self.source_coords_regex
+
+        # in-memory checks first, file system checks last
+        if selection_mode not in (
+            NappingDialog.SelectionMode.FILE,
+            NappingDialog.SelectionMode.DIR,
+        ):
+            return False
+        if (
+            source_img_path is None
+            or target_img_path is None
+            or control_points_path is None
+            or joint_transform_path is None
+        ):
+            return False
+        # source and transformed coordinates are either both given or both not
+        has_coords = source_coords_path is not None
+        if has_coords != (transf_coords_path is not None):
+            return False
+        if (
+            pre_transform_path is not None or post_transform_path is not None
+        ) and not has_coords:
+            return False
+        paths: Tuple[Path, ...] = (
+            source_img_path,
+            target_img_path,
+            control_points_path,
+            joint_transform_path,
+        )
+        if has_coords:
+            assert source_coords_path is not None and transf_coords_path is not None
+            paths += (source_coords_path, transf_coords_path)
+        # pairwise comparison, cheaper than hashing the (few) paths into a set
+        for i in range(1, len(paths)):
+            if paths[i] in paths[:i]:
                 return False
-            if self.control_points_path is None or self.control_points_path.is_dir():
+        if (
+            selection_mode == NappingDialog.SelectionMode.DIR
+            and matching_strategy == NappingDialog.MatchingStrategy.REGEX
+        ):
+            if not source_regex:
                 return False
-            if self.joint_transform_path is None or self.joint_transform_path.is_dir():
+            if not target_regex:
                 return False
-            if (
-                self.source_coords_path is not None
-                and not self.source_coords_path.is_file()
-            ):
+            if has_coords and not source_coords_regex:
                 return False
-            if (
-                self.transf_coords_path is not None
-                and self.control_points_path.is_dir()
-            ):
+            try:
+                self._compile_regex(source_regex)
+                self._compile_regex(target_regex)
+                if has_coords:
+                    self._compile_regex(source_coords_regex)
+            except re.error:
                 return False
-        elif self.selection_mode == NappingDialog.SelectionMode.DIR:
-            if self.source_img_path is None or not self.source_img_path.is_dir():
+        if selection_mode == NappingDialog.SelectionMode.FILE:
+            if not self._is_file(self._source_img_path_edit.text()):
                 return False
-            if self.target_img_path is None or not self.target_img_path.is_dir():
+            if not self._is_file(self._target_img_path_edit.text()):
                 return False
-            if self.control_points_path is None or self.control_points_path.is_file():
+            if self._is_dir(self._control_points_path_edit.text()):
                 return False
-            if self.joint_transform_path is None or self.joint_transform_path.is_file():
+            if self._is_dir(self._joint_transform_path_edit.text()):
                 return False
-            if (
-                self.source_coords_path is not None
-                and not self.source_coords_path.is_dir()
-            ):
+            if has_coords and not self._is_file(self._source_coords_path_edit.text()):
                 return False
-            if (
-                self.transf_coords_path is not None
-                and self.control_points_path.is_file()
-            ):
+            if has_coords and self._is_dir(self._transf_coords_path_edit.text()):
                 return False
-            if self.matching_strategy == NappingDialog.MatchingStrategy.REGEX:
-                if not self.source_regex:
-                    return False
-                if not self.target_regex:
-                    return False
-                if self.source_coords_path is not None and not self.source_coords_regex:
-                    return False
         else:
-            return False
-        if (
-            self.pre_transform_path is not None
-            and not self.pre_transform_path.is_file()
+            if not self._is_dir(self._source_img_path_edit.text()):
+                return False
+            if not self._is_dir(self._target_img_path_edit.text()):
+                return False
+            if self._is_file(self._control_points_path_edit.text()):
+                return False
+            if self._is_file(self._joint_transform_path_edit.text()):
+                return False
+            if has_coords and not self._is_dir(self._source_coords_path_edit.text()):
+                return False
+            if has_coords and self._is_file(self._transf_coords_path_edit.text()):
+                return False
+        if pre_transform_path is not None and not self._is_file(
+            self._pre_transform_file_edit.text()
         ):
             return False
-        if (
-            self.post_transform_path is not None
-            and not self.post_transform_path.is_file()
+        if post_transform_path is not None and not self._is_file(
+            self._post_transform_file_edit.text()
         ):
             return False
-        if bool(self.source_coords_path) != bool(self.transf_coords_path):
-            return False
-        if (
-            bool(self.pre_transform_path) or bool(self.post_transform_path)
-        ) and not bool(self.source_coords_path):
-            return False
-        unique_paths = {
-            self.source_img_path,
-            self.target_img_path,
-            self.control_points_path,
-            self.joint_transform_path,
-        }
-        if self.source_coords_path is not None and self.transf_coords_path is not None:
-            unique_paths.update({self.source_coords_path, self.transf_coords_path})
-            if len(unique_paths) != 6:
-                return False
-        elif len(unique_paths) != 4:
-            return False
         return True
 
+    def _is_file(self, path: str) -> bool:
+        return _stat_kind(path, self._stat_generation) == "file"
+
+    def _is_dir(self, path: str) -> bool:
+        return _stat_kind(path, self._stat_generation) == "dir"
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _compile_regex(regex: Optional[str]) -> Optional[Pattern]:
+        return re.compile(regex) if regex else None
+
+    def _schedule_refresh(self, last_path: Union[str, PathLike, None] = None) -> None:
+        if last_path:
+            self._pending_refresh_last_path = last_path
+        self._stat_generation = next(_stat_generations)
+        self._refresh_timer.start()
+
+    def _on_selection_changed(self, *args) -> None:
+        self.refresh()
+
+    def _on_regex_edit_text_changed(self, text: str) -> None:
+        self._schedule_refresh()
+
+    def _on_refresh_timer_timeout(self) -> None:
+        self.refresh(self._pending_refresh_last_path)
+
+    def _load_settings(self) -> Dict[str, Any]:
+        # read all dialog settings at once instead of querying the settings
+        # backend (e.g. the Windows registry) for every single setting
+        self._settings.beginGroup(self.SETTINGS_GROUP)
+        try:
+            return {
+                self._SETTINGS_BY_KEY[key]: self._settings.value(key)
+                for key in self._settings.childKeys()
+                if key in self._SETTINGS_BY_KEY
+            }
+        finally:
+            self._settings.endGroup()
+
     def _on_button_box_accepted(self) -> None:
+        if self._refresh_timer.isActive():
+            self.refresh()
+            if not self.is_valid():
+                return
         assert self.selection_mode is not None
         assert self.transform_type is not None
         assert self.matching_strategy is not None
-        self._settings.setValue(self.SELECTION_MODE_SETTING, self.selection_mode.value)
-        self._settings.setValue(self.SOURCE_IMG_PATH_SETTING, str(self.source_img_path))
-        self._settings.setValue(self.SOURCE_IMG_REGEX_SETTING, self.source_regex)
-        self._settings.setValue(self.TARGET_IMG_PATH_SETTING, str(self.target_img_path))
-        self._settings.setValue(self.TARGET_IMG_REGEX_SETTING, self.target_regex)
-        self._settings.setValue(
-            self.CONTROL_POINTS_PATH_SETTING, str(self.control_points_path)
-        )
-        self._settings.setValue(
-            self.JOINT_TRANSFORM_PATH_SETTING,
-            str(self.joint_transform_path),
-        )
-        self._settings.setValue(self.TRANSFORM_TYPE_SETTING, self.transform_type.value)
-        self._settings.setValue(
-            self.MATCHING_STRATEGY_SETTING, self.matching_strategy.value
-        )
-        self._settings.setValue(
-            self.SOURCE_COORDS_PATH_SETTING,
-            str(self.source_coords_path or ""),
-        )
-        self._settings.setValue(
-            self.SOURCE_COORDS_REGEX_SETTING, self.source_coords_regex
-        )
-        self._settings.setValue(
-            self.TRANSF_COORDS_PATH_SETTING,
-            str(self.transf_coords_path or ""),
-        )
-        self._settings.setValue(
-            self.PRE_TRANSFORM_SETTING, str(self.pre_transform_path or "")
-        )
-        self._settings.setValue(
-            self.POST_TRANSFORM_SETTING,
-            str(self.post_transform_path or ""),
-        )
-        self._settings.sync()
+        settings = {
+            self.SELECTION_MODE_SETTING: self.selection_mode.value,
+            self.SOURCE_IMG_PATH_SETTING: str(self.source_img_path),
+            self.SOURCE_IMG_REGEX_SETTING: self.source_regex,
+            self.TARGET_IMG_PATH_SETTING: str(self.target_img_path),
+            self.TARGET_IMG_REGEX_SETTING: self.target_regex,
+            self.CONTROL_POINTS_PATH_SETTING: str(self.control_points_path),
+            self.JOINT_TRANSFORM_PATH_SETTING: str(self.joint_transform_path),
+            self.TRANSFORM_TYPE_SETTING: self.transform_type.value,
+            self.MATCHING_STRATEGY_SETTING: self.matching_strategy.value,
+            self.SOURCE_COORDS_PATH_SETTING: str(self.source_coords_path or ""),
+            self.SOURCE_COORDS_REGEX_SETTING: self.source_coords_regex,
+            self.TRANSF_COORDS_PATH_SETTING: str(self.transf_coords_path or ""),
+            self.PRE_TRANSFORM_SETTING: str(self.pre_transform_path or ""),
+            self.POST_TRANSFORM_SETTING: str(self.post_transform_path or ""),
+        }
+        # only write (and flush) settings that changed since they were loaded;
+        # loaded values may have been converted to strings by the backend
+        settings_changed = False
+        for key, value in settings.items():
+            loaded_value = self._loaded_settings.get(key)
+            if key not in self._loaded_settings or str(loaded_value) != str(value):
+                self._settings.setValue(key, value)
+                self._loaded_settings[key] = value
+                settings_changed = True
+        if settings_changed:
+            self._settings.sync()
         self.accept()
 
     @property
@@ -620,12 +714,7 @@ class NappingDialog(QDialog):
 
     @property
     def matching_strategy(self) -> Optional["NappingDialog.MatchingStrategy"]:
-        try:
-            return NappingDialog.MatchingStrategy(
-                self._matching_strategy_combo_box.currentText()
-            )
-        except Exception:
-            return None
+        return self._matching_strategy_combo_box.currentData()
 
     @matching_strategy.setter
     def matching_strategy(
@@ -651,6 +740,10 @@ class NappingDialog(QDialog):
     def source_regex(self, source_regex: Optional[str]) -> None:
         self._source_regex_edit.setText(source_regex or "")
 
+    @property
+    def source_regex_compiled(self) -> Optional[Pattern]:
+        return self._compile_regex(self.source_regex)
+
     @property
     def target_img_path(self) -> Optional[Path]:
         return self._target_img_path_edit.get_path()
@@ -667,6 +760,10 @@ class NappingDialog(QDialog):
     def target_regex(self, target_regex: Optional[str]) -> None:
         self._target_regex_edit.setText(target_regex or "")
 
+    @property
+    def target_regex_compiled(self) -> Optional[Pattern]:
+        return self._compile_regex(self.target_regex)
+
     @property
     def control_points_path(self) -> Optional[Path]:
         return self._control_points_path_edit.get_path()
@@ -685,12 +782,7 @@ class NappingDialog(QDialog):
 
     @property
     def transform_type(self) -> Optional["NappingDialog.TransformType"]:
-        try:
-            return NappingDialog.TransformType(
-                self._transform_type_combo_box.currentText()
-            )
-        except Exception:
-            return None
+        return self._transform_type_combo_box.currentData()
 
     @transform_type.setter
     def transform_type(
@@ -716,6 +808,10 @@ class NappingDialog(QDialog):
     def source_coords_regex(self, source_coords_regex: Optional[str]) -> None:
         self._source_coords_regex_edit.setText(source_coords_regex or "")
 
+    @property
+    def source_coords_regex_compiled(self) -> Optional[Pattern]:
+        return self._compile_regex(self.source_coords_regex)
+
     @property
     def transf_coords_path(self) -> Optional[Path]:
         return self._transf_coords_path_edit.get_path()
@@ -1,7 +1,9 @@
 from os import PathLike
 from pathlib import Path
-from typing import Callable, List, Optional, Sequence, Union
+from types import MappingProxyType
+from typing import Callable, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
 from napari.layers import Image, Points
 from napari.layers.utils.layer_utils import features_to_pandas_dataframe
@@ -13,10 +15,31 @@ class NappingViewer:
         ["NappingViewer", Optional[pd.DataFrame]], None
     ]
 
+    POINTS_LAYER_TEXT = MappingProxyType(
+        {
+            "text": "id",
+            "anchor": "upper_left",
+            "color": "red",
+            "translation": (0, 20),
+        }
+    )
+    POINTS_LAYER_KWARGS = MappingProxyType(
+        {
+            "symbol": "cross",
+            "edge_width": 0,
+            "face_color": "red",
+            "name": "Control points",
+        }
+    )
+
+    _PENDING_DATA_ACTIONS = ("adding", "removing", "changing")
+
     def __init__(self, img_file: Union[str, PathLike], **viewer_kwargs) -> None:
         self._control_points_changed_handlers: List[
             NappingViewer.ControlPointsChangedHandler
         ] = []
+        self._control_point_arrays: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._control_points: Optional[pd.DataFrame] = None
         self._viewer = Viewer(**viewer_kwargs)
         self._image_layers = self._load_image_layers(Path(img_file))
         self._points_layer = self._create_points_layer()
@@ -27,16 +50,27 @@ class NappingViewer:
     def close(self) -> None:
         self._viewer.close()
 
-    def get_control_points(self) -> Optional[pd.DataFrame]:
+    def get_control_point_arrays(self) -> Optional[Tuple[np.ndarray, np.ndarray]]:
         if self._points_layer is not None:
-            features = features_to_pandas_dataframe(self._points_layer.features)
-            return pd.DataFrame(
-                data=self._points_layer.data[:, ::-1],
-                index=features["id"].to_numpy(),
-                columns=["x", "y"],
-            )
+            if self._control_point_arrays is None:
+                features = features_to_pandas_dataframe(self._points_layer.features)
+                self._control_point_arrays = (
+                    self._points_layer.data[:, ::-1],
+                    features["id"].to_numpy(),
+                )
+            return self._control_point_arrays
         return None
 
+    def get_control_points(self) -> Optional[pd.DataFrame]:
+        if self._control_points is None:
+            control_point_arrays = self.get_control_point_arrays()
+            if control_point_arrays is not None:
+                xy, ids = control_point_arrays
+                self._control_points = pd.DataFrame(
+                    data=xy, index=ids, columns=["x", "y"]
+                )
+        return self._control_points
+
     def set_control_points(self, value: pd.DataFrame) -> None:
         if self._points_layer is None:
             raise RuntimeError("points layer is None")
@@ -45,6 +79,7 @@ class NappingViewer:
         features["id"] = value.index.to_numpy()
         self._points_layer.features = features
         self._points_layer.refresh()
+        self._invalidate_control_points()
 
     def _load_image_layers(self, img_file: Path) -> List[Image]:
         if img_file.suffix.lower() in [".jfif", ".jpe", ".jpg", ".jpeg"]:
@@ -57,18 +92,11 @@ class NappingViewer:
         return self._viewer.open(str(img_file), plugin=None, layer_type="image")
 
     def _create_points_layer(self) -> Points:
+        # pass copies, napari may modify mutable layer arguments in place
         points_layer = self._viewer.add_points(
             features=pd.DataFrame(columns=["id"]),
-            text={
-                "text": "id",
-                "anchor": "upper_left",
-                "color": "red",
-                "translation": (0, 20),
-            },
-            symbol="cross",
-            edge_width=0,
-            face_color="red",
-            name="Control points",
+            text=dict(self.POINTS_LAYER_TEXT),
+            **self.POINTS_LAYER_KWARGS,
         )
         points_layer.mode = "add"
         points_layer.mouse_drag_callbacks.append(self._on_points_layer_mouse_drag)
@@ -87,12 +115,20 @@ class NappingViewer:
                 yield
             self._handle_control_points_changed()
 
-    def _on_points_layer_data_changed(self, _) -> None:
+    def _on_points_layer_data_changed(self, event) -> None:
         # called when control points are added or deleted; for dragging, see
         # layer.mode == "select" block in _on_points_layer_mouse_drag
+        if getattr(event, "action", None) in self._PENDING_DATA_ACTIONS:
+            # napari>=0.4.18 also emits data events before the data is changed
+            return
         self._handle_control_points_changed()
 
+    def _invalidate_control_points(self) -> None:
+        self._control_point_arrays = None
+        self._control_points = None
+
     def _handle_control_points_changed(self) -> None:
+        self._invalidate_control_points()
         control_points = self.get_control_points()
         for f in self._control_points_changed_handlers:
             f(self, control_points)
@@ -1,7 +1,8 @@
-from typing import TYPE_CHECKING
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Optional, Tuple, Union
 
-import numpy as np
-from qtpy.QtCore import Qt
+from qtpy.QtCore import Qt, QTimer
+from qtpy.QtGui import QIcon, QShowEvent
 from qtpy.QtWidgets import (
     QFormLayout,
     QGroupBox,
@@ -18,6 +19,11 @@ if TYPE_CHECKING:
     from .. import NappingApplication
 
 
+@lru_cache(maxsize=256)
+def _format_residuals_mean(residuals_mean: float) -> str:
+    return f"{residuals_mean:.6f}"
+
+
 class ReadonlyQLineEdit(QLineEdit):
     def __init__(self, *args, **kwargs) -> None:
         super(ReadonlyQLineEdit, self).__init__(*args, **kwargs)
@@ -26,10 +32,24 @@ class ReadonlyQLineEdit(QLineEdit):
 
 
 class NappingWidget(QWidget):
+    REFRESH_DELAY_MSEC = 0
+
+    _prev_icon: Optional[QIcon] = None
+    _next_icon: Optional[QIcon] = None
+
     def __init__(self, app: "NappingApplication", **widget_kwargs) -> None:
         super(NappingWidget, self).__init__(**widget_kwargs)
         self._app = app
         self._refreshing = False
+        self._files_key: Optional[Tuple[Any, ...]] = None
+        self._refresh_on_show = False
+        self._point_count: Optional[int] = None
+        # coalesces refresh requests within one event loop iteration (e.g.
+        # multiple control point changes) into a single refresh
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(self.REFRESH_DELAY_MSEC)
+        self._refresh_timer.timeout.connect(self._on_refresh_timer_timeout)
 
         self._source_img_file_label = ReadonlyQLineEdit(parent=self)
         self._target_img_file_label = ReadonlyQLineEdit(parent=self)
@@ -42,16 +62,13 @@ class NappingWidget(QWidget):
         self._point_count_label = QLabel(parent=self)
         self._residuals_mean_label = QLabel(parent=self)
 
+        prev_icon, next_icon = self._get_icons(self.style())
         self._prev_button = QPushButton(parent=self)
-        self._prev_button.setIcon(
-            self.style().standardIcon(QStyle.StandardPixmap.SP_ArrowBack)
-        )
+        self._prev_button.setIcon(prev_icon)
         self._prev_button.clicked.connect(self._on_prev_button_clicked)
 
         self._next_button = QPushButton(parent=self)
-        self._next_button.setIcon(
-            self.style().standardIcon(QStyle.StandardPixmap.SP_ArrowForward)
-        )
+        self._next_button.setIcon(next_icon)
         self._next_button.clicked.connect(self._on_next_button_clicked)
 
         layout = QVBoxLayout()
@@ -88,65 +105,129 @@ class NappingWidget(QWidget):
         self.setLayout(layout)
 
     def refresh(self) -> None:
+        self._refresh_timer.stop()
+        if not self.isVisible():
+            # hidden widgets are refreshed when shown again, see showEvent
+            self._refresh_on_show = True
+            return
+        self._refresh_on_show = False
         self._refreshing = True
+        navigator = self._app.navigator
+        # file names and progress only change when navigating, so they are only
+        # updated if the current files changed (tuple comparison checks identity
+        # first, so unchanged paths are cheap to compare)
+        files_key = (
+            navigator.current_index,
+            len(navigator),
+            navigator.current_source_img_file,
+            navigator.current_target_img_file,
+            navigator.current_control_points_file,
+            navigator.current_joint_transform_file,
+            navigator.current_source_coords_file,
+            navigator.current_transf_coords_file,
+        )
+        if files_key != self._files_key:
+            self._refresh_files()
+            self._files_key = files_key
+        current_control_points = self._app.get_current_control_points()
+        if current_control_points is not None:
+            point_count: Optional[int] = len(current_control_points)
+        else:
+            point_count = None
+        if point_count != self._point_count:
+            if point_count is not None:
+                self._point_count_label.setNum(point_count)
+            else:
+                self._point_count_label.clear()
+            self._point_count = point_count
+        current_control_points_residuals_mean = (
+            self._app.get_current_control_point_residuals_mean()
+        )
+        if current_control_points_residuals_mean is not None:
+            self._set_text(
+                self._residuals_mean_label,
+                _format_residuals_mean(current_control_points_residuals_mean),
+            )
+        else:
+            self._set_text(self._residuals_mean_label, "")
+        self._refreshing = False
+
+    def schedule_refresh(self) -> None:
+        self._refresh_timer.start()
+
+    def showEvent(self, event: QShowEvent) -> None:
+        super(NappingWidget, self).showEvent(event)
+        if self._refresh_on_show:
+            self.refresh()
+
+    def _refresh_files(self) -> None:
         if self._app.navigator.current_source_img_file is not None:
-            self._source_img_file_label.setText(
-                self._app.navigator.current_source_img_file.name
+            self._set_text(
+                self._source_img_file_label,
+                self._app.navigator.current_source_img_file.name,
             )
         else:
-            self._source_img_file_label.setText(None)
+            self._set_text(self._source_img_file_label, "")
         if self._app.navigator.current_target_img_file is not None:
-            self._target_img_file_label.setText(
-                self._app.navigator.current_target_img_file.name
+            self._set_text(
+                self._target_img_file_label,
+                self._app.navigator.current_target_img_file.name,
             )
         else:
-            self._target_img_file_label.setText(None)
+            self._set_text(self._target_img_file_label, "")
         if self._app.navigator.current_control_points_file is not None:
-            self._control_points_file_label.setText(
-                self._app.navigator.current_control_points_file.name
+            self._set_text(
+                self._control_points_file_label,
+                self._app.navigator.current_control_points_file.name,
             )
         else:
-            self._control_points_file_label.setText(None)
+            self._set_text(self._control_points_file_label, "")
         if self._app.navigator.current_joint_transform_file is not None:
-            self._joint_transform_file_label.setText(
-                self._app.navigator.current_joint_transform_file.name
+            self._set_text(
+                self._joint_transform_file_label,
+                self._app.navigator.current_joint_transform_file.name,
             )
         else:
-            self._joint_transform_file_label.setText(None)
+            self._set_text(self._joint_transform_file_label, "")
         if self._app.navigator.current_source_coords_file is not None:
-            self._source_coords_file_label.setText(
-                self._app.navigator.current_source_coords_file.name
+            self._set_text(
+                self._source_coords_file_label,
+                self._app.navigator.current_source_coords_file.name,
             )
         else:
-            self._source_coords_file_label.setText(None)
+            self._set_text(self._source_coords_file_label, "")
         if self._app.navigator.current_transf_coords_file is not None:
-            self._transf_coords_file_label.setText(
-                self._app.navigator.current_transf_coords_file.name
+            self._set_text(
+                self._transf_coords_file_label,
+                self._app.navigator.current_transf_coords_file.name,
             )
         else:
-            self._transf_coords_file_label.setText(None)
+            self._set_text(self._transf_coords_file_label, "")
         if len(self._app.navigator) > 0:
-            self._progress_label.setText(
+            self._set_text(
+                self._progress_label,
                 f"{self._app.navigator.current_index + 1}"
-                f"/{len(self._app.navigator)}"
-            )
-        else:
-            self._progress_label.setText(None)
-        current_control_points = self._app.get_current_control_points()
-        if current_control_points is not None:
-            self._point_count_label.setText(str(len(current_control_points.index)))
-        else:
-            self._point_count_label.setText(None)
-        current_control_points_residuals = (
-            self._app.get_current_control_point_residuals()
-        )
-        if current_control_points_residuals is not None:
-            self._residuals_mean_label.setText(
-                f"{np.mean(current_control_points_residuals):.6f}"
+                f"/{len(self._app.navigator)}",
             )
         else:
-            self._residuals_mean_label.setText(None)
-        self._refreshing = False
+            self._set_text(self._progress_label, "")
+
+    @classmethod
+    def _get_icons(cls, style: QStyle) -> Tuple[QIcon, QIcon]:
+        # widgets are recreated for every image, so the icons are shared
+        if cls._prev_icon is None or cls._next_icon is None:
+            cls._prev_icon = style.standardIcon(QStyle.StandardPixmap.SP_ArrowBack)
+            cls._next_icon = style.standardIcon(QStyle.StandardPixmap.SP_ArrowForward)
+        return cls._prev_icon, cls._next_icon
+
+    @staticmethod
+    def _set_text(widget: Union[QLabel, QLineEdit], text: str) -> None:
+        # setText triggers relayouting/repainting even if the text is unchanged
+        if widget.text() != text:
+            widget.setText(text)
+
+    def _on_refresh_timer_timeout(self) -> None:
+        self.refresh()
 
     def _on_prev_button_clicked(self, checked: bool = False) -> None:
         self._app.navigator.prev()